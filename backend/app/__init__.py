@@ -1,15 +1,30 @@
 from flask import Flask
 from flask_cors import CORS
 from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
 from app.config import Config
 from app.models import db
 from app.routes import register_blueprints
+from app.cli import register_commands
+from app.utils.cart_store import init_cart_store
+from app.utils.jobs import register_tasks
+from app.utils.rate_limit import init_rate_limiter
+from app.utils.scheduler import init_scheduler
+from app.utils.ticket_codes import check_signing_keys
 
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # Ticket codes must outlive SECRET_KEY rotations
+    check_signing_keys(app)
+    
+    # Take the client address and scheme from the trusted proxies' headers
+    proxies = app.config.get('TRUSTED_PROXIES')
+    if proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies, x_host=proxies)
+    
     # Initialize extensions
     db.init_app(app)
     Migrate(app, db)
@@ -17,6 +32,19 @@ def create_app(config_class=Config):
     
     # Register blueprints
     register_blueprints(app)
+    register_commands(app)
+    
+    # Where anonymous carts are kept until checkout
+    init_cart_store(app)
+    
+    # Admission control for expensive endpoints
+    init_rate_limiter(app)
+    
+    # Handlers for queued jobs, run by `flask jobs work`
+    register_tasks()
+    
+    # Background maintenance jobs
+    init_scheduler(app)
     
     return app
 
@@ -0,0 +1,400 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+import hashlib
+import hmac
+import random
+import signal
+import time
+import urllib.error
+import urllib.request
+import uuid
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.exc import OperationalError
+from app.models import db, Event, InventoryHold, Job, NewsPost, Order, OrderItem, Ticket, TicketType, User
+from app.utils.jobs import work
+
+
+jobs_cli = AppGroup('jobs', help='Background job queue.')
+
+
+@jobs_cli.command('work')
+@click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+@click.option('--batch-size', default=10, show_default=True, help='Jobs claimed per poll.')
+@click.option('--poll-interval', default=1.0, show_default=True, help='Seconds to sleep when idle.')
+@click.option('--worker-id', default=None, help='Defaults to host:pid.')
+def work_command(burst, batch_size, poll_interval, worker_id):
+    """Run a worker; start several processes for more throughput."""
+    stopping = []
+    
+    def stop(signum, frame):
+        # Finish the job in hand, then exit
+        stopping.append(signum)
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    processed = work(worker_id=worker_id, burst=burst, batch_size=batch_size,
+                     poll_interval=poll_interval, should_stop=lambda: bool(stopping))
+    click.echo(f'Processed {processed} jobs')
+
+
+@jobs_cli.command('status')
+def status_command():
+    """Show job counts by task and status."""
+    rows = db.session.query(Job.task, Job.status, func.count(Job.id)).group_by(Job.task, Job.status).order_by(Job.task, Job.status).all()
+    if not rows:
+        click.echo('No jobs')
+    for task_name, status, count in rows:
+        click.echo(f'{task_name:<32} {status:<8} {count}')
+
+
+@jobs_cli.command('retry')
+@click.argument('job_ids', nargs=-1, type=int)
+@click.option('--all-failed', is_flag=True, help='Requeue every failed job.')
+def retry_command(job_ids, all_failed):
+    """Requeue failed jobs with a fresh set of attempts."""
+    if not job_ids and not all_failed:
+        raise click.UsageError('Pass job ids or --all-failed')
+    stmt = update(Job).where(Job.status == 'failed')
+    if not all_failed:
+        stmt = stmt.where(Job.id.in_(job_ids))
+    result = db.session.execute(
+        stmt.values(status='queued', attempts=0, run_at=func.now(), finished_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    click.echo(f'Requeued {result.rowcount} jobs')
+
+
+users_cli = AppGroup('users', help='User accounts.')
+
+
+@users_cli.command('revoke-tokens')
+@click.argument('email')
+def revoke_tokens_command(email):
+    """Sign a user out everywhere by invalidating every token issued to them."""
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        raise click.ClickException(f'No user with email {email}')
+    user.revoke_tokens()
+    db.session.commit()
+    click.echo(f'Revoked tokens for {email} (token version {user.token_version})')
+
+
+passwords_cli = AppGroup('passwords', help='Password hashing.')
+
+
+@passwords_cli.command('bench')
+@click.option('--rounds', 'costs', multiple=True, type=int, help='bcrypt costs to try (repeatable).  [default: 8, 10, BCRYPT_ROUNDS]')
+@click.option('--clients', default=8, show_default=True, help='Concurrent logins.')
+@click.option('--seconds', default=5.0, show_default=True, help='Run time per cost.')
+def passwords_bench_command(costs, clients, seconds):
+    """Measure password checks per second (the CPU cost of a login) under concurrent load.
+    
+    Goes through verify_password, so PASSWORD_HASH_WORKERS and
+    PASSWORD_HASH_TIMEOUT apply as they do for real logins.
+    """
+    import bcrypt
+    from app.utils.passwords import PasswordHashBusy, verify_password
+    
+    app = current_app._get_current_object()
+    costs = costs or sorted({8, 10, current_app.config['BCRYPT_ROUNDS']})
+    click.echo(f'{clients} clients, PASSWORD_HASH_WORKERS={current_app.config["PASSWORD_HASH_WORKERS"]}, {seconds:g}s per cost')
+    for cost in costs:
+        stored = bcrypt.hashpw(b'correct horse', bcrypt.gensalt(rounds=cost)).decode('ascii')
+        deadline = time.perf_counter() + seconds
+        
+        def client(_):
+            latencies, busy = [], 0
+            with app.app_context():
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        verify_password('correct horse', stored)
+                    except PasswordHashBusy:
+                        busy += 1
+                        continue
+                    latencies.append(time.perf_counter() - started)
+            return latencies, busy
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(clients) as pool:
+            results = list(pool.map(client, range(clients)))
+        elapsed = time.perf_counter() - started
+        latencies = sorted(latency for result, _ in results for latency in result)
+        busy = sum(count for _, count in results)
+        if not latencies:
+            click.echo(f'cost {cost:>2}: no check finished within {seconds:g}s ({busy} busy)')
+            continue
+        click.echo(f'cost {cost:>2}: {len(latencies) / elapsed:7.1f} checks/s   '
+                   f'p50 {latencies[len(latencies) // 2] * 1000:7.1f}ms   '
+                   f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:7.1f}ms   {busy} busy')
+
+
+payments_cli = AppGroup('payments', help='Payment webhook tools.')
+
+
+@payments_cli.command('replay')
+@click.argument('events_file', type=click.File('r'))
+@click.option('--url', default='http://localhost:5000/api/v1/payments/webhooks/stripe', show_default=True)
+@click.option('--concurrency', default=8, show_default=True, help='Parallel deliveries.')
+@click.option('--repeat', default=1, show_default=True, help='Deliver each event this many times, like provider retries.')
+def replay_command(events_file, url, concurrency, repeat):
+    """Replay recorded Stripe events (one JSON object per line) against the webhook.
+    
+    Stands in for the provider when testing locally: each delivery is signed
+    with STRIPE_WEBHOOK_SECRET and the current time.
+    """
+    secret = current_app.config.get('STRIPE_WEBHOOK_SECRET')
+    if not secret:
+        raise click.UsageError('STRIPE_WEBHOOK_SECRET is not set')
+    bodies = [line.strip().encode('utf-8') for line in events_file if line.strip()] * repeat
+    
+    def deliver(body):
+        timestamp = str(int(time.time()))
+        signature = hmac.new(secret.encode('utf-8'), timestamp.encode('ascii') + b'.' + body, hashlib.sha256).hexdigest()
+        req = urllib.request.Request(url, data=body, method='POST', headers={
+            'Content-Type': 'application/json',
+            'Stripe-Signature': f't={timestamp},v1={signature}',
+        })
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except (urllib.error.URLError, OSError):
+            status = 'error'
+        return status, time.perf_counter() - started
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(deliver, bodies))
+    elapsed = time.perf_counter() - started
+    
+    latencies = sorted(latency for _, latency in results)
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    click.echo(f'{len(results)} deliveries in {elapsed:.2f}s ({len(results) / elapsed:.0f}/s), statuses {statuses}')
+    if latencies:
+        click.echo(f'latency p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, '
+                   f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms')
+
+
+inventory_cli = AppGroup('inventory', help='Ticket inventory.')
+
+
+@inventory_cli.command('bench')
+@click.option('--tickets', default=100, show_default=True, help='Stock of the scratch ticket type.')
+@click.option('--checkouts', default=300, show_default=True, help='Concurrent single-ticket reservations.')
+@click.option('--threads', default=32, show_default=True)
+@click.option('--expired-holds', default=0, show_default=True, help='Stock tied up in lapsed holds at the start.')
+def inventory_bench_command(tickets, checkouts, threads, expired_holds):
+    """Race reservations against a scratch ticket type and check nothing is oversold.
+    
+    The scratch event and ticket type are deleted afterwards.
+    """
+    from app.utils.inventory import reserve_tickets
+    
+    app = current_app._get_current_object()
+    tag = uuid.uuid4().hex[:8]
+    event = Event(slug=f'inventory-bench-{tag}', title='Inventory bench', start_datetime=datetime.utcnow(), status='draft')
+    ticket_type = TicketType(event=event, name='Bench', price=Decimal('1.00'), quantity_total=tickets,
+                             quantity_sold=0, quantity_held=expired_holds, is_active=True)
+    db.session.add_all([event, ticket_type])
+    db.session.flush()
+    if expired_holds:
+        db.session.add(InventoryHold(session_id=f'bench-{tag}', ticket_type_id=ticket_type.id, quantity=expired_holds,
+                                     expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+    ticket_type_id = ticket_type.id
+    
+    def checkout(_):
+        with app.app_context():
+            try:
+                if reserve_tickets(ticket_type_id, 1):
+                    db.session.commit()
+                    return 'sold'
+                db.session.rollback()
+                return 'rejected'
+            except OperationalError:
+                db.session.rollback()
+                return 'error'
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(checkout, range(checkouts)))
+    elapsed = time.perf_counter() - started
+    
+    db.session.expire_all()
+    sold, held = db.session.query(TicketType.quantity_sold, TicketType.quantity_held).filter_by(id=ticket_type_id).one()
+    counts = {outcome: results.count(outcome) for outcome in ('sold', 'rejected', 'error')}
+    click.echo(f'{checkouts} reservations on {threads} threads in {elapsed:.2f}s ({checkouts / elapsed:.0f}/s): {counts}')
+    click.echo(f'quantity_total {tickets}, quantity_sold {sold}, quantity_held {held}')
+    
+    InventoryHold.query.filter_by(ticket_type_id=ticket_type_id).delete()
+    TicketType.query.filter_by(id=ticket_type_id).delete()
+    Event.query.filter_by(slug=event.slug).delete()
+    db.session.commit()
+    if sold != counts['sold'] or sold > tickets:
+        raise click.ClickException('Inventory counts do not match the reservations made')
+
+
+search_cli = AppGroup('search', help='Event search.')
+
+_SEARCH_BENCH_WORDS = (
+    'jazz night festival classical dance workshop comedy film poetry folk rock orchestra choir '
+    'exhibition gallery market food wine family kids summer winter spring autumn community '
+    'charity gala premiere tour acoustic electronic symphony theatre opera ballet lecture'
+).split()
+
+
+@search_cli.command('bench')
+@click.argument('queries', nargs=-1)
+@click.option('--seed', default=0, show_default=True,
+              help='Insert this many generated draft events first (deleted afterwards); use a scratch database.')
+@click.option('--repeat', default=5, show_default=True, help='Timed runs per query; the best is reported.')
+def search_bench_command(queries, seed, repeat):
+    """Time event search through the full-text index against the LIKE fallback.
+    
+    Each run does what list_events does: a count and the first page of 20.
+    """
+    from app.utils.search import like_search, search_events
+    
+    queries = queries or ('jazz', 'summer festival', 'orch')
+    tag = uuid.uuid4().hex[:8]
+    if seed:
+        rng = random.Random(0)
+        now = datetime.utcnow()
+        # Mostly filler from a large vocabulary, so the themed words are as rare as real search terms
+        syllables = ['ka', 'to', 'ri', 'men', 'sa', 'lo', 'ven', 'di', 'ra', 'nu', 'pe', 'gor', 'li', 'an', 'so']
+        filler = [''.join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(20000)]
+        
+        def words(k):
+            return ' '.join(rng.choice(_SEARCH_BENCH_WORDS) if rng.random() < 0.02 else rng.choice(filler)
+                            for _ in range(k))
+        for start in range(0, seed, 5000):
+            db.session.execute(insert(Event), [
+                {
+                    'slug': f'search-bench-{tag}-{i}',
+                    'title': words(4).title(),
+                    'description': words(60),
+                    'start_datetime': now,
+                    'status': 'draft',
+                }
+                for i in range(start, min(start + 5000, seed))
+            ])
+        db.session.commit()
+    
+    def best(build):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query = build()
+            total = query.order_by(None).count()
+            query.order_by(Event.start_datetime.asc()).limit(20).all()
+            timings.append(time.perf_counter() - started)
+            db.session.rollback()
+        return min(timings) * 1000, total
+    
+    try:
+        click.echo(f'{Event.query.count()} events, {db.session.get_bind().dialect.name}, best of {repeat}')
+        for q in queries:
+            indexed, hits = best(lambda: search_events(Event.query, q)[0])
+            scanned, like_hits = best(lambda: like_search(Event.query, q))
+            click.echo(f'{q!r:<20} index {indexed:8.1f}ms ({hits} hits)   '
+                       f'LIKE {scanned:8.1f}ms ({like_hits} hits)   {scanned / indexed:5.1f}x')
+    finally:
+        if seed:
+            db.session.execute(delete(Event).where(Event.slug.like(f'search-bench-{tag}-%')))
+            db.session.commit()
+
+
+serializers_cli = AppGroup('serializers', help='Model serializers.')
+
+
+def _bench_lists(count):
+    """In-memory (never flushed) events, orders with two items and news posts with authors.
+    
+    Every column is set, as it is on instances loaded from the database.
+    """
+    now = datetime(2026, 1, 1, 20, 0)
+    author = User(id=1, email='editor@example.com', first_name='Ed', last_name='Itor', role='admin', created_at=now)
+    events, orders, posts = [], [], []
+    for i in range(1, count + 1):
+        event = Event(id=i, slug=f'event-{i}', title=f'Event {i}', subtitle='Live', description='Lorem ipsum ' * 40,
+                      venue='Hall', address='1 Main St', city='Springfield', state='IL', zip='62701',
+                      start_datetime=now, end_datetime=now, cover_image_url=f'/img/{i}.jpg', status='published',
+                      created_at=now, updated_at=now)
+        ticket_type = TicketType(id=i, event_id=i, name='GA', description='General admission', price=Decimal('25.00'),
+                                 currency='USD', quantity_total=500, quantity_sold=120, quantity_held=4,
+                                 sales_start=now, sales_end=None, is_active=True, created_at=now, updated_at=now)
+        items = [
+            OrderItem(id=i * 2 + n, order_id=i, event_id=i, ticket_type_id=i, quantity=2, unit_price=Decimal('25.00'),
+                      event=event, ticket_type=ticket_type, tickets=[
+                          Ticket(id=i * 4 + n * 2 + t, order_item_id=i * 2 + n, ticket_code=f'TKT-{i:06d}{n}{t}',
+                                 holder_name='Pat Doe', holder_email='pat@example.com', checked_in=False,
+                                 checked_in_at=None, qr_code_url=f'/api/v1/tickets/qr/{i:032d}.png')
+                          for t in range(2)
+                      ])
+            for n in range(2)
+        ]
+        orders.append(Order(id=i, order_number=f'KAT-{i:08d}', user_id=1, email='pat@example.com',
+                            subtotal=Decimal('100.00'), fees=Decimal('0.00'), total=Decimal('100.00'), currency='USD',
+                            status='paid', payment_provider='stripe', payment_intent_id=f'pi_{i}',
+                            created_at=now, updated_at=now, items=items))
+        events.append(event)
+        posts.append(NewsPost(id=i, slug=f'post-{i}', title=f'Post {i}', excerpt='Short excerpt',
+                              content='Lorem ipsum ' * 200, cover_image_url=f'/img/p{i}.jpg', published_at=now,
+                              status='published', author_id=1, author=author, created_at=now, updated_at=now))
+    return events, orders, posts
+
+
+@serializers_cli.command('bench')
+@click.option('--count', default=100, show_default=True, help='Items per list.')
+@click.option('--repeat', default=50, show_default=True, help='Timed runs per case; the best is reported.')
+def bench_command(count, repeat):
+    """Time list serialization with to_dict() + jsonify against the compiled serializers."""
+    from app.utils.serializers import get_json_encoder, serialize_event, serialize_news_post, serialize_order
+    
+    events, orders, posts = _bench_lists(count)
+    baseline = current_app.json
+    encode = get_json_encoder()
+    cases = [
+        ('Event', events, lambda e: e.to_dict(include_tickets=False), serialize_event),
+        ('Order', orders, lambda o: o.to_dict(), serialize_order),
+        ('NewsPost', posts, lambda p: p.to_dict(), serialize_news_post),
+    ]
+    
+    def best(func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
+    
+    click.echo(f'{count} items per list, best of {repeat}; encoder {encode.__name__.strip("_")}')
+    for name, items, to_dict, serialize in cases:
+        expected = baseline.dumps([to_dict(item) for item in items], separators=(',', ':')).encode('ascii')
+        if encode([serialize(item) for item in items]) != expected:
+            raise click.ClickException(f'{name}: compiled output differs from to_dict()')
+        old = best(lambda: baseline.dumps([to_dict(item) for item in items], separators=(',', ':')))
+        compiled = best(lambda: [serialize(item) for item in items])
+        new = best(lambda: encode([serialize(item) for item in items]))
+        click.echo(f'{name:<9} to_dict+jsonify {old:7.2f}ms   compiled {compiled:7.2f}ms   '
+                   f'compiled+encode {new:7.2f}ms   {old / new:4.1f}x   ({len(expected) // 1024} KB)')
+
+
+def register_commands(app):
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(users_cli)
+    app.cli.add_command(passwords_cli)
+    app.cli.add_command(payments_cli)
+    app.cli.add_command(inventory_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(serializers_cli)
@@ -10,12 +10,36 @@ os.makedirs(INSTANCE_DIR, exist_ok=True)
 DEFAULT_SQLITE_PATH = os.path.join(INSTANCE_DIR, 'katcheri_dev.db')
 
 
+DEV_SECRET_KEY = 'dev-secret-key-change-in-production'
+
+
 class Config:
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
+    # Setting SECRET_KEY requires TICKET_SIGNING_KEYS too: ticket codes signed with a key
+    # derived from SECRET_KEY would all be rejected as forged once it is rotated
+    SECRET_KEY = os.environ.get('SECRET_KEY') or DEV_SECRET_KEY
     JWT_SECRET = os.environ.get('JWT_SECRET') or 'dev-jwt-secret-change-in-production'
     JWT_ALGORITHM = 'HS256'
     JWT_EXPIRATION_DELTA = 3600  # 1 hour
     JWT_REFRESH_EXPIRATION_DELTA = 604800  # 7 days
+    # Authorize from access token claims (role, token version) instead of loading the user
+    JWT_CLAIMS_AUTH = os.environ.get('JWT_CLAIMS_AUTH', 'false').lower() == 'true'
+    JWT_REVOCATION_REFRESH_INTERVAL = int(os.environ.get('JWT_REVOCATION_REFRESH_INTERVAL') or 30)  # seconds
+    
+    # Ticket code signing: "id:secret,..."; TICKET_SIGNING_KEY_ID signs new codes and must be
+    # listed unless running with the development SECRET_KEY. Unlisted key 0 falls back to one
+    # derived from SECRET_KEY. Keep retired keys listed so codes they signed still verify.
+    TICKET_SIGNING_KEYS = os.environ.get('TICKET_SIGNING_KEYS') or ''
+    TICKET_SIGNING_KEY_ID = int(os.environ.get('TICKET_SIGNING_KEY_ID') or 0)
+    
+    # Password hashing: bcrypt work factor and how many hashes a process runs at once.
+    # Requests that wait PASSWORD_HASH_TIMEOUT for a free slot get a 503.
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS') or 12)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 4)
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT') or 10)  # seconds
+    
+    # Process-level cache of user rows used by get_current_user (0 disables)
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE') or 0)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 60)  # seconds
     
     # Database connection
     SQLALCHEMY_DATABASE_URI = (
@@ -29,17 +53,85 @@ class Config:
         'pool_recycle': 300,
     }
     
+    # Response cache for the public events catalog (0 disables)
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE') or 512)
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL') or 60)  # seconds
+    
+    # List endpoints: 'auto' uses orjson when installed; bigger lists are streamed in chunks
+    JSON_ENCODER = os.environ.get('JSON_ENCODER') or 'auto'
+    JSON_STREAM_THRESHOLD = int(os.environ.get('JSON_STREAM_THRESHOLD') or 500)  # items
+    JSON_STREAM_CHUNK_SIZE = int(os.environ.get('JSON_STREAM_CHUNK_SIZE') or 200)  # items
+    
+    # Ticket inventory
+    INVENTORY_HOLD_TTL = int(os.environ.get('INVENTORY_HOLD_TTL') or 600)  # 10 minutes
+    # Expired holds still count against stock until the scheduler releases them
+    INVENTORY_HOLD_RELEASE_INTERVAL = int(os.environ.get('INVENTORY_HOLD_RELEASE_INTERVAL') or 60)  # seconds
+    
+    # Anonymous carts idle this long are deleted by the scheduler
+    CART_IDLE_TTL = int(os.environ.get('CART_IDLE_TTL') or 172800)  # 2 days
+    CART_SWEEP_INTERVAL = int(os.environ.get('CART_SWEEP_INTERVAL') or 600)  # 10 minutes
+    CART_SWEEP_BATCH_SIZE = int(os.environ.get('CART_SWEEP_BATCH_SIZE') or 500)
+    CART_SWEEP_MAX_BATCHES = int(os.environ.get('CART_SWEEP_MAX_BATCHES') or 20)
+    # Where anonymous carts live until checkout: 'sql' (Cart rows), 'memory' (one process only),
+    # 'sqlite' (a local file shared by the workers on a host) or 'redis' (shared by every host)
+    CART_STORE = os.environ.get('CART_STORE') or 'sql'
+    CART_STORE_PATH = os.environ.get('CART_STORE_PATH') or os.path.join(INSTANCE_DIR, 'carts.db')
+    CART_STORE_REDIS_URL = os.environ.get('CART_STORE_REDIS_URL') or 'redis://localhost:6379/0'
+    
+    # Ticket QR images: rendered in a process pool into a content-addressed cache
+    QR_CACHE_DIR = os.environ.get('QR_CACHE_DIR') or os.path.join(INSTANCE_DIR, 'qr')
+    QR_RENDER_WORKERS = int(os.environ.get('QR_RENDER_WORKERS') or 2)
+    QR_RENDER_TIMEOUT = int(os.environ.get('QR_RENDER_TIMEOUT') or 10)  # seconds
+    QR_CACHE_MAX_AGE = int(os.environ.get('QR_CACHE_MAX_AGE') or 31536000)  # 1 year
+    
+    # Background job queue (run workers with `flask jobs work`)
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS') or 5)
+    JOB_BACKOFF_BASE = int(os.environ.get('JOB_BACKOFF_BASE') or 10)  # seconds, doubled per attempt
+    JOB_BACKOFF_MAX = int(os.environ.get('JOB_BACKOFF_MAX') or 3600)  # seconds
+    JOB_LOCK_TIMEOUT = int(os.environ.get('JOB_LOCK_TIMEOUT') or 600)  # reclaim jobs running longer than this
+    JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS') or 7)
+    JOB_PURGE_INTERVAL = int(os.environ.get('JOB_PURGE_INTERVAL') or 3600)  # 1 hour
+    
+    # Background scheduler (APScheduler)
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    ROLLUP_RECONCILE_INTERVAL = int(os.environ.get('ROLLUP_RECONCILE_INTERVAL') or 900)  # 15 minutes
+    SALES_ROLLUP_INTERVAL = int(os.environ.get('SALES_ROLLUP_INTERVAL') or 300)  # 5 minutes
+    
+    # Number of reverse proxies in front of the app. Their X-Forwarded-For/-Proto/-Host
+    # headers are trusted, so request.remote_addr (which rate limits key on) is the client.
+    # Leave at 0 when clients connect directly, or they could forge their address.
+    TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES') or 0)
+    
+    # Per-endpoint rate limits ("count/period"), shared by all workers on a host
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE') or os.path.join(INSTANCE_DIR, 'rate_limits.db')
+    RATE_LIMITS = {
+        'auth.login': os.environ.get('RATE_LIMIT_LOGIN') or '10/minute',
+        'orders.checkout': os.environ.get('RATE_LIMIT_CHECKOUT') or '20/minute',
+        'contact.submit_contact': os.environ.get('RATE_LIMIT_CONTACT') or '5/minute',
+    }
+    
     # CORS
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:5173').split(',')
     
-    # Stripe (for later)
+    # Stripe
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
     STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
+    STRIPE_WEBHOOK_TOLERANCE = int(os.environ.get('STRIPE_WEBHOOK_TOLERANCE') or 300)  # seconds
+    PAYMENT_EVENT_BATCH_SIZE = int(os.environ.get('PAYMENT_EVENT_BATCH_SIZE') or 200)
+    PAYMENT_EVENT_BATCH_DELAY = float(os.environ.get('PAYMENT_EVENT_BATCH_DELAY') or 1)  # seconds
+    # Out-of-order events (a refund before its payment) are retried with the job backoff this many times
+    PAYMENT_EVENT_MAX_ATTEMPTS = int(os.environ.get('PAYMENT_EVENT_MAX_ATTEMPTS') or 8)
     
-    # Email (for later)
+    # Email (order confirmations are sent by the job workers when MAIL_SERVER is set)
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() == 'true'
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or 'tickets@katcheri.org'
+    MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE') or 4)
+    MAIL_MAX_MESSAGES_PER_CONNECTION = int(os.environ.get('MAIL_MAX_MESSAGES_PER_CONNECTION') or 100)
+    MAIL_POOL_IDLE_TIMEOUT = int(os.environ.get('MAIL_POOL_IDLE_TIMEOUT') or 60)  # seconds
+    MAIL_TIMEOUT = int(os.environ.get('MAIL_TIMEOUT') or 30)  # seconds
 
@@ -5,18 +5,23 @@ db = SQLAlchemy()
 from app.models.user import User
 from app.models.event import Event
 from app.models.ticket_type import TicketType
+from app.models.inventory_hold import InventoryHold
 from app.models.cart import Cart, CartItem
 from app.models.order import Order, OrderItem, Ticket
 from app.models.news import NewsPost
 from app.models.club import ClubInfo
 from app.models.media import MediaAsset
 from app.models.contact import ContactMessage
+from app.models.stats import StatsRollup, SalesDaily
+from app.models.job import Job
+from app.models.payment_event import PaymentEvent
 
 __all__ = [
     'db',
     'User',
     'Event',
     'TicketType',
+    'InventoryHold',
     'Cart',
     'CartItem',
     'Order',
@@ -26,5 +31,9 @@ __all__ = [
     'ClubInfo',
     'MediaAsset',
     'ContactMessage',
+    'StatsRollup',
+    'SalesDaily',
+    'Job',
+    'PaymentEvent',
 ]
 
@@ -1,8 +1,14 @@
+from collections import namedtuple
 from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from app.models import db
 import uuid
 
 
+CartSnapshot = namedtuple('CartSnapshot', ['items', 'subtotal'])
+
+
 class Cart(db.Model):
     __tablename__ = 'carts'
     
@@ -10,7 +16,8 @@ class Cart(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
     session_id = db.Column(db.String(255), unique=True, nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
+    # Last activity; abandoned carts are swept by this
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     items = db.relationship('CartItem', backref='cart', lazy='dynamic', cascade='all, delete-orphan')
@@ -21,17 +28,30 @@ class Cart(db.Model):
             self.session_id = str(uuid.uuid4())
     
     def get_total(self):
-        """Calculate cart total"""
-        return sum(item.get_subtotal() for item in self.items.all())
+        """Calculate cart total in SQL"""
+        return db.session.query(
+            func.coalesce(func.sum(CartItem.unit_price * CartItem.quantity), 0)
+        ).filter(CartItem.cart_id == self.id).scalar()
     
-    def to_dict(self):
-        items = [item.to_dict() for item in self.items.all()]
+    def snapshot(self):
+        """Load items with their ticket types and the SQL-computed subtotal in two queries"""
+        items = (
+            CartItem.query
+            .options(joinedload(CartItem.ticket_type))
+            .filter(CartItem.cart_id == self.id)
+            .order_by(CartItem.id)
+            .all()
+        )
+        return CartSnapshot(items=items, subtotal=self.get_total() if items else 0)
+    
+    def to_dict(self, snapshot=None):
+        snapshot = snapshot or self.snapshot()
         return {
             'id': self.id,
             'user_id': self.user_id,
             'session_id': self.session_id,
-            'items': items,
-            'subtotal': float(self.get_total()),
+            'items': [item.to_dict() for item in snapshot.items],
+            'subtotal': float(snapshot.subtotal),
             'created_at': self.created_at.isoformat() if self.created_at else None,
         }
 
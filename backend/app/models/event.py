@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy import DDL, event
 from app.models import db
 
 
@@ -49,3 +50,31 @@ class Event(db.Model):
             data['ticket_types'] = [tt.to_dict() for tt in self.ticket_types.filter_by(is_active=True).all()]
         return data
 
+
+
+# Full-text search index over title and description. SQLite keeps an FTS5
+# external-content table in sync through triggers; PostgreSQL uses a GIN
+# expression index that app.utils.search queries with the same expression.
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+    "title, description, content='events', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF title, description ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO events_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+]
+
+POSTGRES_SEARCH_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_events_search ON events USING GIN "
+    "(to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, '')))",
+]
+
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Event.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+for _statement in POSTGRES_SEARCH_DDL:
+    event.listen(Event.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
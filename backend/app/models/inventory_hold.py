@@ -0,0 +1,33 @@
+from datetime import datetime
+from app.models import db
+
+
+class InventoryHold(db.Model):
+    __tablename__ = 'inventory_holds'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    cart_id = db.Column(db.Integer, db.ForeignKey('carts.id'), nullable=True, index=True)
+    # Set instead of cart_id for anonymous carts kept in the session cart store
+    session_id = db.Column(db.String(255), nullable=True, index=True)
+    ticket_type_id = db.Column(db.Integer, db.ForeignKey('ticket_types.id'), nullable=False, index=True)
+    quantity = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('cart_id', 'ticket_type_id', name='uq_inventory_holds_cart_ticket_type'),
+        db.UniqueConstraint('session_id', 'ticket_type_id', name='uq_inventory_holds_session_ticket_type'),
+    )
+    
+    def is_expired(self):
+        return self.expires_at <= datetime.utcnow()
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'cart_id': self.cart_id,
+            'session_id': self.session_id,
+            'ticket_type_id': self.ticket_type_id,
+            'quantity': self.quantity,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+        }
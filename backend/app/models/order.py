@@ -1,5 +1,7 @@
 from datetime import datetime
+from sqlalchemy.orm import selectinload
 from app.models import db
+import os
 import uuid
 
 
@@ -16,18 +18,27 @@ class Order(db.Model):
     currency = db.Column(db.String(3), default='USD')
     status = db.Column(db.String(20), default='pending', nullable=False, index=True)  # 'pending', 'paid', 'canceled', 'refunded'
     payment_provider = db.Column(db.String(50))
-    payment_intent_id = db.Column(db.String(255))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
+    payment_intent_id = db.Column(db.String(255), index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow, index=True)
     
     # Relationships
-    items = db.relationship('OrderItem', backref='order', lazy='dynamic', cascade='all, delete-orphan')
+    items = db.relationship('OrderItem', backref='order', lazy='select', cascade='all, delete-orphan')
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         if not self.order_number:
             self.order_number = f"KAT-{uuid.uuid4().hex[:8].upper()}"
     
+    @classmethod
+    def query_with_items(cls):
+        """Query that loads items, their event/ticket type and tickets up front"""
+        return cls.query.options(
+            selectinload(cls.items).joinedload(OrderItem.event),
+            selectinload(cls.items).joinedload(OrderItem.ticket_type),
+            selectinload(cls.items).selectinload(OrderItem.tickets),
+        )
+    
     def to_dict(self, include_items=True):
         data = {
             'id': self.id,
@@ -45,7 +56,7 @@ class Order(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
         if include_items:
-            data['items'] = [item.to_dict() for item in self.items.all()]
+            data['items'] = [item.to_dict() for item in self.items]
         return data
 
 
@@ -60,7 +71,7 @@ class OrderItem(db.Model):
     unit_price = db.Column(db.Numeric(10, 2), nullable=False)
     
     # Relationships
-    tickets = db.relationship('Ticket', backref='order_item', lazy='dynamic', cascade='all, delete-orphan')
+    tickets = db.relationship('Ticket', backref='order_item', lazy='select', cascade='all, delete-orphan')
     
     def get_subtotal(self):
         return float(self.unit_price * self.quantity)
@@ -76,7 +87,7 @@ class OrderItem(db.Model):
             'quantity': self.quantity,
             'unit_price': float(self.unit_price),
             'subtotal': self.get_subtotal(),
-            'tickets': [t.to_dict() for t in self.tickets.all()],
+            'tickets': [t.to_dict() for t in self.tickets],
         }
 
 
@@ -89,12 +100,29 @@ class Ticket(db.Model):
     holder_name = db.Column(db.String(255))
     holder_email = db.Column(db.String(255))
     checked_in = db.Column(db.Boolean, default=False, index=True)
-    qr_code_url = db.Column(db.String(500))
+    checked_in_at = db.Column(db.DateTime)
+    qr_code_url = db.Column(db.String(500), index=True)
+    # Bumped on every change so offline manifests can sync deltas
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         if not self.ticket_code:
-            self.ticket_code = f"TKT-{uuid.uuid4().hex[:12].upper()}"
+            self.ticket_code = self.generate_codes(1)[0]
+    
+    @staticmethod
+    def generate_codes(count, event_id=None):
+        """Generate `count` ticket codes from a single entropy read.
+
+        With an event id the codes are signed (see app.utils.ticket_codes) and
+        can be rejected as forged without a lookup; otherwise they are plain
+        random `TKT-` codes.
+        """
+        if event_id is not None:
+            from app.utils.ticket_codes import sign_codes
+            return sign_codes(event_id, count)
+        raw = os.urandom(6 * count).hex().upper()
+        return [f"TKT-{raw[i:i + 12]}" for i in range(0, len(raw), 12)]
     
     def to_dict(self):
         return {
@@ -104,6 +132,7 @@ class Ticket(db.Model):
             'holder_name': self.holder_name,
             'holder_email': self.holder_email,
             'checked_in': self.checked_in,
+            'checked_in_at': self.checked_in_at.isoformat() if self.checked_in_at else None,
             'qr_code_url': self.qr_code_url,
         }
 
@@ -0,0 +1,40 @@
+from datetime import datetime
+from app.models import db
+
+
+class PaymentEvent(db.Model):
+    """A payment provider webhook event, recorded once per provider event id"""
+    __tablename__ = 'payment_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    provider = db.Column(db.String(50), nullable=False)
+    event_id = db.Column(db.String(255), nullable=False)
+    event_type = db.Column(db.String(100), nullable=False)
+    payment_intent_id = db.Column(db.String(255), index=True)
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), default='received', nullable=False, index=True)  # 'received', 'applied', 'ignored'
+    error = db.Column(db.String(500))
+    # Events that arrive before the one they depend on stay 'received' and are retried
+    attempts = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    retry_at = db.Column(db.DateTime)
+    provider_created_at = db.Column(db.DateTime)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.UniqueConstraint('provider', 'event_id', name='uq_payment_events_provider_event_id'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'provider': self.provider,
+            'event_id': self.event_id,
+            'event_type': self.event_type,
+            'payment_intent_id': self.payment_intent_id,
+            'status': self.status,
+            'error': self.error,
+            'attempts': self.attempts,
+            'received_at': self.received_at.isoformat() if self.received_at else None,
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None,
+        }
@@ -0,0 +1,56 @@
+from datetime import datetime
+from app.models import db
+
+
+class StatsRollup(db.Model):
+    __tablename__ = 'stats_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)  # single row, id=1
+    orders_total = db.Column(db.Integer, default=0, nullable=False)
+    revenue_total = db.Column(db.Numeric(12, 2), default=0, nullable=False)
+    events_total = db.Column(db.Integer, default=0, nullable=False)
+    events_published = db.Column(db.Integer, default=0, nullable=False)
+    news_total = db.Column(db.Integer, default=0, nullable=False)
+    news_published = db.Column(db.Integer, default=0, nullable=False)
+    users_total = db.Column(db.Integer, default=0, nullable=False)
+    reconciled_at = db.Column(db.DateTime)
+    sales_refreshed_at = db.Column(db.DateTime)  # watermark for SalesDaily refreshes
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'orders': {
+                'total': self.orders_total
+            },
+            'revenue': {
+                'total': float(self.revenue_total)
+            },
+            'events': {
+                'total': self.events_total,
+                'published': self.events_published
+            },
+            'news': {
+                'total': self.news_total,
+                'published': self.news_published
+            },
+            'users': {
+                'total': self.users_total
+            },
+            'reconciled_at': self.reconciled_at.isoformat() if self.reconciled_at else None,
+        }
+
+
+class SalesDaily(db.Model):
+    """Paid sales per day, event and ticket type, maintained by a background job"""
+    __tablename__ = 'sales_daily'
+    
+    day = db.Column(db.Date, primary_key=True)
+    event_id = db.Column(db.Integer, primary_key=True)
+    ticket_type_id = db.Column(db.Integer, primary_key=True)
+    orders_count = db.Column(db.Integer, default=0, nullable=False)
+    tickets_sold = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Numeric(12, 2), default=0, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_sales_daily_event_id_day', 'event_id', 'day'),
+    )
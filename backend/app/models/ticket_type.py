@@ -13,27 +13,35 @@ class TicketType(db.Model):
     currency = db.Column(db.String(3), default='USD')
     quantity_total = db.Column(db.Integer, nullable=False)
     quantity_sold = db.Column(db.Integer, default=0)
+    quantity_held = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     sales_start = db.Column(db.DateTime)
     sales_end = db.Column(db.DateTime)
     is_active = db.Column(db.Boolean, default=True, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_ticket_types_event_id_price', 'event_id', 'price'),
+    )
+    
     # Relationships
     cart_items = db.relationship('CartItem', backref='ticket_type', lazy='dynamic')
     order_items = db.relationship('OrderItem', backref='ticket_type', lazy='dynamic')
     
     def get_available_quantity(self):
-        """Get remaining available tickets"""
-        return max(0, self.quantity_total - self.quantity_sold)
+        """Get remaining available tickets (excluding those held in carts)"""
+        return max(0, self.quantity_total - (self.quantity_sold or 0) - (self.quantity_held or 0))
     
     def is_available(self):
         """Check if ticket type is available for purchase"""
-        if not self.is_active:
-            return False
         if self.get_available_quantity() <= 0:
             return False
-        from datetime import datetime
+        return self.is_on_sale()
+    
+    def is_on_sale(self):
+        """Check if ticket type is active and inside its sales window"""
+        if not self.is_active:
+            return False
         now = datetime.utcnow()
         if self.sales_start and now < self.sales_start:
             return False
@@ -51,6 +59,7 @@ class TicketType(db.Model):
             'currency': self.currency,
             'quantity_total': self.quantity_total,
             'quantity_sold': self.quantity_sold,
+            'quantity_held': self.quantity_held,
             'quantity_available': self.get_available_quantity(),
             'sales_start': self.sales_start.isoformat() if self.sales_start else None,
             'sales_end': self.sales_end.isoformat() if self.sales_end else None,
@@ -1,6 +1,5 @@
 from datetime import datetime
 from app.models import db
-import bcrypt
 
 
 class User(db.Model):
@@ -12,6 +11,7 @@ class User(db.Model):
     first_name = db.Column(db.String(100))
     last_name = db.Column(db.String(100))
     role = db.Column(db.String(20), default='user', nullable=False)  # 'user' or 'admin'
+    token_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
     
@@ -22,17 +22,30 @@ class User(db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = bcrypt.hashpw(
-            password.encode('utf-8'),
-            bcrypt.gensalt()
-        ).decode('utf-8')
+        from app.utils.passwords import hash_password
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         """Check if password matches"""
-        return bcrypt.checkpw(
-            password.encode('utf-8'),
-            self.password_hash.encode('utf-8')
-        )
+        from app.utils.passwords import verify_password
+        return verify_password(password, self.password_hash)
+    
+    def upgrade_password_hash(self, password):
+        """Re-hash a verified password if BCRYPT_ROUNDS changed since it was set"""
+        from app.utils.passwords import needs_rehash
+        if needs_rehash(self.password_hash):
+            self.set_password(password)
+            # Same password, so tokens issued with the old hash stay valid
+            self._rehashing_password = True
+            return True
+        return False
+    
+    def revoke_tokens(self):
+        """Invalidate every token issued to this user so far.
+
+        Done automatically when the role or password changes.
+        """
+        self.token_version = (self.token_version or 0) + 1
     
     def to_dict(self):
         return {
@@ -8,6 +8,7 @@ from app.routes.media import media_bp
 from app.routes.contact import contact_bp
 from app.routes.social import social_bp
 from app.routes.admin import admin_bp
+from app.routes.payments import payments_bp
 
 
 def register_blueprints(app):
@@ -21,4 +22,5 @@ def register_blueprints(app):
     app.register_blueprint(contact_bp, url_prefix='/api/v1/contact')
     app.register_blueprint(social_bp, url_prefix='/api/v1/social')
     app.register_blueprint(admin_bp, url_prefix='/api/v1/admin')
+    app.register_blueprint(payments_bp, url_prefix='/api/v1/payments')
 
@@ -1,7 +1,10 @@
-from flask import Blueprint, jsonify
-from sqlalchemy import func
-from app.models import db, Order, Event, NewsPost, User
+from flask import Blueprint, request, jsonify, current_app
+from app.models import Order
 from app.utils.auth import require_admin
+from app.utils.response_cache import get_response_cache
+from app.utils.rollups import get_rollup
+from app.utils.analytics import sales_series
+from app.utils.carts import sweeper_stats
 from datetime import datetime, timedelta
 
 admin_bp = Blueprint('admin', __name__)
@@ -10,42 +13,68 @@ admin_bp = Blueprint('admin', __name__)
 @admin_bp.route('/stats', methods=['GET'])
 @require_admin
 def get_stats():
-    """Get admin dashboard statistics"""
-    now = datetime.utcnow()
-    last_30_days = now - timedelta(days=30)
+    """Get admin dashboard statistics from the incrementally maintained rollup"""
+    last_30_days = datetime.utcnow() - timedelta(days=30)
     
-    total_orders = Order.query.count()
-    recent_orders = Order.query.filter(Order.created_at >= last_30_days).count()
-    total_revenue = db.session.query(func.sum(Order.total)).filter(
-        Order.status == 'paid'
-    ).scalar() or 0
-    
-    total_events = Event.query.count()
-    published_events = Event.query.filter_by(status='published').count()
-    
-    total_posts = NewsPost.query.count()
-    published_posts = NewsPost.query.filter_by(status='published').count()
+    stats = get_rollup().to_dict()
+    # Sliding window; bounded range scan on ix_orders_created_at
+    stats['orders']['recent_30_days'] = Order.query.filter(Order.created_at >= last_30_days).count()
+    return jsonify(stats)
+
+
+@admin_bp.route('/analytics', methods=['GET'])
+@require_admin
+def get_analytics():
+    """Get sales over time, bucketed by hour, day or week"""
+    granularity = request.args.get('granularity', 'day')
+    group_by = request.args.get('group_by')
+    if group_by not in (None, 'event', 'ticket_type'):
+        return jsonify({'error': 'group_by must be event or ticket_type'}), 400
     
-    total_users = User.query.count()
+    try:
+        end = _parse_datetime(request.args.get('end')) or datetime.utcnow()
+        default_span = timedelta(days=1) if granularity == 'hour' else timedelta(days=30)
+        start = _parse_datetime(request.args.get('start')) or end - default_span
+        event_id = request.args.get('event_id', type=int)
+        ticket_type_id = request.args.get('ticket_type_id', type=int)
+        buckets = sales_series(granularity, start, end, event_id=event_id,
+                               ticket_type_id=ticket_type_id, group_by=group_by)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
     
     return jsonify({
-        'orders': {
-            'total': total_orders,
-            'recent_30_days': recent_orders
-        },
-        'revenue': {
-            'total': float(total_revenue)
-        },
-        'events': {
-            'total': total_events,
-            'published': published_events
-        },
-        'news': {
-            'total': total_posts,
-            'published': published_posts
-        },
-        'users': {
-            'total': total_users
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'buckets': buckets,
+        'totals': {
+            'orders': sum(b['orders'] for b in buckets),
+            'tickets_sold': sum(b['tickets_sold'] for b in buckets),
+            'revenue': round(sum(b['revenue'] for b in buckets), 2)
         }
     })
 
+
+def _parse_datetime(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+@admin_bp.route('/cache', methods=['GET'])
+@require_admin
+def get_cache_stats():
+    """Get hit rates for the in-process caches"""
+    response_cache = get_response_cache()
+    user_cache = current_app.extensions.get('user_cache')
+    return jsonify({
+        'responses': response_cache.stats() if response_cache else None,
+        'users': user_cache.stats() if user_cache else None
+    })
+
+
+@admin_bp.route('/maintenance', methods=['GET'])
+@require_admin
+def get_maintenance_stats():
+    """Rows reclaimed by this worker's background sweeps"""
+    return jsonify({'abandoned_carts': sweeper_stats()})
@@ -1,12 +1,21 @@
 from flask import Blueprint, request, jsonify
 from marshmallow import Schema, fields, validate
 from app.models import db, User
-from app.utils.auth import generate_token, get_current_user, require_auth
+from app.utils.auth import generate_token, get_current_user, load_user, require_auth
+from app.utils.passwords import PasswordHashBusy
 from app.utils.validation import validate_request
 
 auth_bp = Blueprint('auth', __name__)
 
 
+@auth_bp.errorhandler(PasswordHashBusy)
+def password_hash_busy(error):
+    response = jsonify({'error': 'Too many sign-ins right now, please try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
 class RegisterSchema(Schema):
     email = fields.Email(required=True)
     password = fields.Str(required=True, validate=validate.Length(min=8))
@@ -37,8 +46,8 @@ def register(data):
     db.session.add(user)
     db.session.commit()
     
-    access_token = generate_token(user.id)
-    refresh_token = generate_token(user.id, is_refresh=True)
+    access_token = generate_token(user.id, role=user.role, token_version=user.token_version)
+    refresh_token = generate_token(user.id, is_refresh=True, token_version=user.token_version)
     
     return jsonify({
         'user': user.to_dict(),
@@ -55,8 +64,12 @@ def login(data):
     if not user or not user.check_password(data['password']):
         return jsonify({'error': 'Invalid credentials'}), 401
     
-    access_token = generate_token(user.id)
-    refresh_token = generate_token(user.id, is_refresh=True)
+    # Transparently move old hashes to the current work factor
+    if user.upgrade_password_hash(data['password']):
+        db.session.commit()
+    
+    access_token = generate_token(user.id, role=user.role, token_version=user.token_version)
+    refresh_token = generate_token(user.id, is_refresh=True, token_version=user.token_version)
     
     return jsonify({
         'user': user.to_dict(),
@@ -77,11 +90,14 @@ def refresh():
     if not payload or payload.get('type') != 'refresh':
         return jsonify({'error': 'Invalid refresh token'}), 401
     
-    user = User.query.get(payload['user_id'])
+    user = load_user(payload['user_id'])
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    access_token = generate_token(user.id)
+    if payload.get('ver', 0) < user.token_version:
+        return jsonify({'error': 'Invalid refresh token'}), 401
+    
+    access_token = generate_token(user.id, role=user.role, token_version=user.token_version)
     
     return jsonify({
         'access_token': access_token
@@ -2,8 +2,12 @@ from flask import Blueprint, request, jsonify
 from marshmallow import Schema, fields
 from datetime import datetime
 from app.models import db, Event, TicketType
-from app.utils.auth import get_current_user, require_admin
+from app.utils.auth import get_current_identity, require_admin
 from app.utils.validation import validate_request, PaginationSchema
+from app.utils.response_cache import cached_response
+from app.utils.search import search_events
+from app.utils.pagination import paginate_keyset, keyset_pagination_info
+from app.utils.serializers import json_list_response, requested_fields, serialize_event
 
 events_bp = Blueprint('events', __name__)
 
@@ -41,16 +45,21 @@ class EventUpdateSchema(Schema):
 
 
 @events_bp.route('', methods=['GET'])
+@cached_response(tags=lambda data: ['event-list'])
 def list_events():
-    query = Event.query
+    # Sparse fieldsets: `fields=title,start_datetime` trims both the JSON and the SELECT.
+    # The description is left out unless asked for.
+    try:
+        fields = requested_fields(serialize_event)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    query = Event.query.options(serialize_event.load_only(fields, Event.start_datetime))
     
     # Filters
     q = request.args.get('q')
     if q:
-        query = query.filter(
-            (Event.title.contains(q)) |
-            (Event.description.contains(q))
-        )
+        # Ranked full-text search; relevance takes precedence over date ordering
+        query, _ = search_events(query, q)
     
     date_from = request.args.get('date_from')
     if date_from:
@@ -75,18 +84,17 @@ def list_events():
     min_price = request.args.get('min_price')
     max_price = request.args.get('max_price')
     if min_price or max_price:
-        # Filter by ticket prices
-        ticket_query = TicketType.query
+        # Filter by ticket prices with a correlated EXISTS (uses ix_ticket_types_event_id_price)
+        price_match = TicketType.query.filter(TicketType.event_id == Event.id)
         if min_price:
-            ticket_query = ticket_query.filter(TicketType.price >= float(min_price))
+            price_match = price_match.filter(TicketType.price >= float(min_price))
         if max_price:
-            ticket_query = ticket_query.filter(TicketType.price <= float(max_price))
-        event_ids = [tt.event_id for tt in ticket_query.all()]
-        query = query.filter(Event.id.in_(event_ids))
+            price_match = price_match.filter(TicketType.price <= float(max_price))
+        query = query.filter(price_match.exists())
     
     # Only show published events to non-admins
-    user = get_current_user()
-    if not user or user.role != 'admin':
+    identity = get_current_identity()
+    if not identity or identity.role != 'admin':
         query = query.filter(Event.status == 'published')
     
     # Order by start_datetime
@@ -95,26 +103,41 @@ def list_events():
     # Pagination
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    
+    if 'cursor' in request.args:
+        # Keyset pagination on (start_datetime, id): no OFFSET, count only on request
+        try:
+            keyset = paginate_keyset(
+                query, [(Event.start_datetime, False), (Event.id, False)],
+                per_page, request.args['cursor']
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        return json_list_response(
+            keyset.items, serialize_event.only(fields), 'events',
+            pagination=keyset_pagination_info(
+                query, keyset, per_page, request.args.get('include_total') == 'true'
+            )
+        )
+    
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     
-    return jsonify({
-        'events': [e.to_dict(include_tickets=False) for e in pagination.items],
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': pagination.total,
-            'pages': pagination.pages
-        }
+    return json_list_response(pagination.items, serialize_event.only(fields), 'events', pagination={
+        'page': page,
+        'per_page': per_page,
+        'total': pagination.total,
+        'pages': pagination.pages
     })
 
 
 @events_bp.route('/<slug>', methods=['GET'])
+@cached_response(tags=lambda data: [f"event:{data['id']}"] + [f"ticket_type:{tt['id']}" for tt in data['ticket_types']])
 def get_event(slug):
     event = Event.query.filter_by(slug=slug).first_or_404()
     
     # Check if user can view draft/archived events
-    user = get_current_user()
-    if event.status != 'published' and (not user or user.role != 'admin'):
+    identity = get_current_identity()
+    if event.status != 'published' and (not identity or identity.role != 'admin'):
         return jsonify({'error': 'Event not found'}), 404
     
     return jsonify(event.to_dict(include_tickets=True))
@@ -3,6 +3,7 @@ from marshmallow import Schema, fields
 from app.models import db, MediaAsset
 from app.utils.auth import require_admin
 from app.utils.validation import validate_request
+from app.utils.serializers import json_list_response, requested_fields, serialize_media_asset
 
 media_bp = Blueprint('media', __name__)
 
@@ -17,8 +18,19 @@ class MediaCreateSchema(Schema):
 
 @media_bp.route('/gallery', methods=['GET'])
 def get_gallery():
-    assets = MediaAsset.query.filter_by(type='image').order_by(MediaAsset.created_at.desc()).all()
-    return jsonify([a.to_dict() for a in assets])
+    try:
+        fields = requested_fields(serialize_media_asset)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    
+    assets = (
+        MediaAsset.query
+        .options(serialize_media_asset.load_only(fields, MediaAsset.created_at))
+        .filter_by(type='image')
+        .order_by(MediaAsset.created_at.desc())
+        .all()
+    )
+    return json_list_response(assets, serialize_media_asset.only(fields))
 
 
 @media_bp.route('/upload', methods=['POST'])
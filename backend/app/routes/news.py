@@ -2,8 +2,10 @@ from flask import Blueprint, request, jsonify
 from marshmallow import Schema, fields
 from datetime import datetime
 from app.models import db, NewsPost
-from app.utils.auth import get_current_user, require_admin
+from app.utils.auth import get_current_identity, require_admin
 from app.utils.validation import validate_request, PaginationSchema
+from app.utils.pagination import paginate_keyset, keyset_pagination_info
+from app.utils.serializers import json_list_response, requested_fields, serialize_news_post
 
 news_bp = Blueprint('news', __name__)
 
@@ -30,27 +32,48 @@ class NewsUpdateSchema(Schema):
 
 @news_bp.route('', methods=['GET'])
 def list_news():
-    query = NewsPost.query
+    # Sparse fieldsets as on the events list; the content is left out unless asked for
+    try:
+        fields = requested_fields(serialize_news_post)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    query = NewsPost.query.options(
+        serialize_news_post.load_only(fields, NewsPost.published_at, NewsPost.created_at)
+    )
     
     # Only show published posts to non-admins
-    user = get_current_user()
-    if not user or user.role != 'admin':
+    identity = get_current_identity()
+    if not identity or identity.role != 'admin':
         query = query.filter(NewsPost.status == 'published')
     
     query = query.order_by(NewsPost.published_at.desc(), NewsPost.created_at.desc())
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    
+    if 'cursor' in request.args:
+        # Keyset pagination on (published_at, created_at, id)
+        try:
+            keyset = paginate_keyset(
+                query, [(NewsPost.published_at, True), (NewsPost.created_at, True), (NewsPost.id, True)],
+                per_page, request.args['cursor']
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        return json_list_response(
+            keyset.items, serialize_news_post.only(fields), 'posts',
+            pagination=keyset_pagination_info(
+                query, keyset, per_page, request.args.get('include_total') == 'true'
+            )
+        )
+    
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     
-    return jsonify({
-        'posts': [p.to_dict() for p in pagination.items],
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': pagination.total,
-            'pages': pagination.pages
-        }
+    return json_list_response(pagination.items, serialize_news_post.only(fields), 'posts', pagination={
+        'page': page,
+        'per_page': per_page,
+        'total': pagination.total,
+        'pages': pagination.pages
     })
 
 
@@ -58,8 +81,8 @@ def list_news():
 def get_news(slug):
     post = NewsPost.query.filter_by(slug=slug).first_or_404()
     
-    user = get_current_user()
-    if post.status != 'published' and (not user or user.role != 'admin'):
+    identity = get_current_identity()
+    if post.status != 'published' and (not identity or identity.role != 'admin'):
         return jsonify({'error': 'Post not found'}), 404
     
     return jsonify(post.to_dict())
@@ -72,8 +95,8 @@ def create_news(data):
     if NewsPost.query.filter_by(slug=data['slug']).first():
         return jsonify({'error': 'Post slug already exists'}), 400
     
-    user = get_current_user()
-    post = NewsPost(**data, author_id=user.id)
+    identity = get_current_identity()
+    post = NewsPost(**data, author_id=identity.id)
     db.session.add(post)
     db.session.commit()
     
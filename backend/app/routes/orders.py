@@ -1,8 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from marshmallow import Schema, fields
-from app.models import db, Order, OrderItem, Ticket, Cart, CartItem, TicketType
-from app.utils.auth import get_current_user, require_auth
+from sqlalchemy import func
+from app.models import db, Order, OrderItem, Cart, CartItem
+from app.utils.auth import get_current_user, get_current_identity, require_auth
 from app.utils.validation import validate_request
+from app.utils.inventory import purchase_tickets, release_holds
+from app.utils.cart_store import SessionCart, load_cart
+from app.utils.tickets import issue_tickets
+from app.utils.jobs import enqueue
+from app.utils.pagination import paginate_keyset, keyset_pagination_info
+from app.utils.serializers import json_list_response, requested_fields, serialize_order
 
 orders_bp = Blueprint('orders', __name__)
 
@@ -17,18 +24,14 @@ class CheckoutSchema(Schema):
 def preview_order():
     """Preview order from cart"""
     user = get_current_user()
-    cart = None
+    session_id = request.headers.get('X-Session-ID') or request.cookies.get('session_id')
+    cart = load_cart(user, session_id)
     
-    if user:
-        cart = Cart.query.filter_by(user_id=user.id).first()
-    else:
-        session_id = request.headers.get('X-Session-ID') or request.cookies.get('session_id')
-        cart = Cart.query.filter_by(session_id=session_id).first() if session_id else None
-    
-    if not cart or cart.items.count() == 0:
+    snapshot = cart.snapshot() if cart else None
+    if not snapshot or not snapshot.items:
         return jsonify({'error': 'Cart is empty'}), 400
     
-    subtotal = float(cart.get_total())
+    subtotal = float(snapshot.subtotal)
     fees = 0  # Can add fees later
     total = subtotal + fees
     
@@ -45,27 +48,45 @@ def preview_order():
 def checkout(data):
     """Create order from cart (payment will be added later)"""
     user = get_current_user()
-    cart = None
-    
-    if user:
-        cart = Cart.query.filter_by(user_id=user.id).first()
-    else:
-        session_id = request.headers.get('X-Session-ID') or request.cookies.get('session_id')
-        cart = Cart.query.filter_by(session_id=session_id).first() if session_id else None
+    session_id = request.headers.get('X-Session-ID') or request.cookies.get('session_id')
+    cart = load_cart(user, session_id)
+    if not isinstance(cart, SessionCart):
+        return _place_order(cart, user, data)
     
-    if not cart or cart.items.count() == 0:
+    # A session store cart is taken out of the store before anything is bought,
+    # so a second checkout of the same cart can't also succeed
+    if not cart.claim():
+        return jsonify({'error': 'This cart is already being checked out'}), 409
+    try:
+        response, status = _place_order(cart, user, data)
+    except Exception:
+        cart.restore()
+        raise
+    if status != 201:
+        cart.restore()
+    return response, status
+
+
+def _place_order(cart, user, data):
+    snapshot = cart.snapshot() if cart else None
+    if not snapshot or not snapshot.items:
         return jsonify({'error': 'Cart is empty'}), 400
     
     # Validate availability
-    for item in cart.items.all():
-        ticket_type = TicketType.query.get(item.ticket_type_id)
-        if not ticket_type.is_available():
+    for item in snapshot.items:
+        ticket_type = item.ticket_type
+        if not ticket_type.is_on_sale():
             return jsonify({'error': f'Ticket type {ticket_type.name} is no longer available'}), 400
-        if item.quantity > ticket_type.get_available_quantity():
-            return jsonify({'error': f'Insufficient tickets for {ticket_type.name}'}), 400
+    
+    # Claim inventory: converts the cart's holds, or reserves atomically if they lapsed
+    for item in snapshot.items:
+        if not purchase_tickets(cart.id, item.ticket_type_id, item.quantity):
+            name = item.ticket_type.name
+            db.session.rollback()
+            return jsonify({'error': f'Insufficient tickets for {name}'}), 400
     
     # Create order
-    subtotal = float(cart.get_total())
+    subtotal = float(snapshot.subtotal)
     fees = 0
     total = subtotal + fees
     
@@ -80,59 +101,119 @@ def checkout(data):
     db.session.add(order)
     db.session.flush()
     
-    # Create order items and tickets
-    for cart_item in cart.items.all():
-        ticket_type = cart_item.ticket_type
-        order_item = OrderItem(
-            order_id=order.id,
-            event_id=ticket_type.event_id,
-            ticket_type_id=ticket_type.id,
-            quantity=cart_item.quantity,
-            unit_price=cart_item.unit_price
-        )
-        db.session.add(order_item)
-        db.session.flush()
-        
-        # Create tickets
-        holder_name = data.get('holder_name') or (f"{user.first_name} {user.last_name}" if user else None)
-        holder_email = data.get('holder_email') or data['email']
-        
-        for _ in range(cart_item.quantity):
-            ticket = Ticket(
-                order_item_id=order_item.id,
-                holder_name=holder_name,
-                holder_email=holder_email
-            )
-            db.session.add(ticket)
-        
-        # Update ticket type sold count
-        ticket_type.quantity_sold += cart_item.quantity
+    # Create order items and tickets in bulk
+    holder_name = data.get('holder_name') or (f"{user.first_name} {user.last_name}" if user else None)
+    holder_email = data.get('holder_email') or data['email']
+    issue_tickets(order, snapshot.items, holder_name=holder_name, holder_email=holder_email)
+    
+    # Clear cart; a session store cart already left the store when it was claimed
+    release_holds(cart.id)
+    if isinstance(cart, Cart):
+        CartItem.query.filter_by(cart_id=cart.id).delete()
+        db.session.delete(cart)
     
-    # Clear cart
-    CartItem.query.filter_by(cart_id=cart.id).delete()
-    db.session.delete(cart)
+    # Follow-up work runs on the job workers once the order commits
+    enqueue('render_order_qr_codes', {'order_id': order.id}, idempotency_key=f'order:{order.id}:qr_codes')
+    if current_app.config.get('MAIL_SERVER'):
+        enqueue('send_order_confirmation', {'order_id': order.id}, idempotency_key=f'order:{order.id}:confirmation')
     
     db.session.commit()
     
+    order = Order.query_with_items().filter_by(id=order.id).one()
     return jsonify(order.to_dict()), 201
 
 
 @orders_bp.route('', methods=['GET'])
 @require_auth
 def list_orders():
-    user = get_current_user()
-    orders = Order.query.filter_by(user_id=user.id).order_by(Order.created_at.desc()).all()
-    return jsonify([o.to_dict() for o in orders])
+    """List the current user's orders.
+
+    `view=summary` omits line items and adds a ticket count per order.
+    `fields=` picks the fields returned (`items` and `ticket_count` included);
+    items are only loaded when asked for.
+    Passing `page`/`per_page` returns a paginated envelope instead of a bare list;
+    passing `cursor` (empty for the first page) switches to keyset pagination.
+    """
+    identity = get_current_identity()
+    summary = request.args.get('view') == 'summary'
+    default = [f for f in serialize_order.fields if f != 'items'] + ['ticket_count'] if summary else None
+    try:
+        fields = requested_fields(serialize_order, extra=('ticket_count',), default=default)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    
+    query = Order.query_with_items() if 'items' in fields else Order.query
+    query = query.options(serialize_order.load_only(fields, Order.created_at))
+    query = query.filter_by(user_id=identity.id).order_by(Order.created_at.desc(), Order.id.desc())
+    
+    if 'cursor' in request.args:
+        # Keyset pagination on (created_at, id)
+        per_page = min(int(request.args.get('per_page', 20)), 100)
+        try:
+            keyset = paginate_keyset(
+                query, [(Order.created_at, True), (Order.id, True)],
+                per_page, request.args['cursor']
+            )
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        return json_list_response(
+            keyset.items, _order_serializer(keyset.items, fields), 'orders',
+            pagination=keyset_pagination_info(
+                query, keyset, per_page, request.args.get('include_total') == 'true'
+            )
+        )
+    
+    paginated = 'page' in request.args or 'per_page' in request.args
+    if paginated:
+        page = int(request.args.get('page', 1))
+        per_page = min(int(request.args.get('per_page', 20)), 100)
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        orders = pagination.items
+    else:
+        orders = query.all()
+    
+    serialize = _order_serializer(orders, fields)
+    if not paginated:
+        return json_list_response(orders, serialize)
+    
+    return json_list_response(orders, serialize, 'orders', pagination={
+        'page': page,
+        'per_page': per_page,
+        'total': pagination.total,
+        'pages': pagination.pages
+    })
+
+
+def _order_serializer(orders, fields):
+    """Serializer for a page of orders; a ticket_count comes from one grouped query"""
+    serialize = serialize_order.only(fields)
+    if 'ticket_count' not in fields:
+        return serialize
+    
+    order_ids = [o.id for o in orders]
+    counts = {}
+    if order_ids:
+        counts = dict(
+            db.session.query(OrderItem.order_id, func.sum(OrderItem.quantity))
+            .filter(OrderItem.order_id.in_(order_ids))
+            .group_by(OrderItem.order_id)
+            .all()
+        )
+    
+    def serialize_with_count(order):
+        data = serialize(order)
+        data['ticket_count'] = int(counts.get(order.id) or 0)
+        return data
+    return serialize_with_count
 
 
 @orders_bp.route('/<int:order_id>', methods=['GET'])
 @require_auth
 def get_order(order_id):
-    user = get_current_user()
-    order = Order.query.get_or_404(order_id)
+    identity = get_current_identity()
+    order = Order.query_with_items().filter_by(id=order_id).first_or_404()
     
-    if order.user_id != user.id and user.role != 'admin':
+    if order.user_id != identity.id and identity.role != 'admin':
         return jsonify({'error': 'Unauthorized'}), 403
     
     return jsonify(order.to_dict())
-
@@ -0,0 +1,31 @@
+from flask import Blueprint, current_app, request, jsonify
+from app.models import db
+from app.utils.payments import SignatureError, record_event, schedule_payment_events, verify_stripe_signature
+
+payments_bp = Blueprint('payments', __name__)
+
+
+@payments_bp.route('/webhooks/stripe', methods=['POST'])
+def stripe_webhook():
+    """Record a Stripe event and acknowledge it; orders are updated by the job workers"""
+    secret = current_app.config.get('STRIPE_WEBHOOK_SECRET')
+    if not secret:
+        return jsonify({'error': 'Webhook not configured'}), 503
+    
+    payload = request.get_data()
+    try:
+        verify_stripe_signature(payload, request.headers.get('Stripe-Signature'), secret,
+                                tolerance=current_app.config['STRIPE_WEBHOOK_TOLERANCE'])
+    except SignatureError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    event = request.get_json(silent=True)
+    if not isinstance(event, dict) or not event.get('id') or not event.get('type'):
+        return jsonify({'error': 'Invalid event'}), 400
+    
+    if record_event('stripe', event):
+        # One job per batch window, so a burst of events is applied as one batch
+        schedule_payment_events()
+    db.session.commit()
+    
+    return jsonify({'received': True}), 200
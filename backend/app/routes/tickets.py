@@ -1,11 +1,29 @@
-from flask import Blueprint, request, jsonify
+from datetime import datetime
+import os
+import re
+from flask import Blueprint, Response, current_app, request, jsonify, send_file, stream_with_context
 from marshmallow import Schema, fields, validate
-from app.models import db, Cart, CartItem, TicketType
-from app.utils.auth import get_current_user as get_user
+from app.models import db, Cart, CartItem, Event, Ticket, TicketType
+from app.utils.auth import get_current_user as get_user, require_admin
 from app.utils.validation import validate_request
+from app.utils.inventory import hold_tickets, release_holds
+from app.utils.cart_store import SessionCart, load_cart, new_cart, session_cart_store
+from app.utils.checkin import check_in_tickets
+from app.utils.manifest import build_bloom_manifest, manifest_version, stream_manifest
+from app.utils.qr import QRRenderBusy, ensure_qr, qr_path
 
 tickets_bp = Blueprint('tickets', __name__)
 
+QR_KEY_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+@tickets_bp.errorhandler(QRRenderBusy)
+def qr_render_busy(error):
+    response = jsonify({'error': 'QR code is still rendering, please try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
 
 class AddToCartSchema(Schema):
     event_id = fields.Int(required=True)
@@ -13,6 +31,26 @@ class AddToCartSchema(Schema):
     quantity = fields.Int(required=True, validate=validate.Range(min=1))
 
 
+class ScanSchema(Schema):
+    code = fields.Str(required=True, validate=validate.Length(min=1, max=100))
+    scanned_at = fields.DateTime()
+
+
+class ScanBatchSchema(Schema):
+    scans = fields.List(fields.Nested(ScanSchema), required=True, validate=validate.Length(min=1, max=1000))
+
+
+# HTTP status for a single scan's outcome
+CHECK_IN_STATUS_CODES = {
+    'checked_in': 200,
+    'already_checked_in': 409,
+    'wrong_event': 409,
+    'void': 409,
+    'forged': 404,
+    'not_found': 404,
+}
+
+
 @tickets_bp.route('/events/<int:event_id>/tickets', methods=['GET'])
 def get_event_tickets(event_id):
     ticket_types = TicketType.query.filter_by(event_id=event_id, is_active=True).all()
@@ -24,24 +62,29 @@ def get_event_tickets(event_id):
 def add_to_cart(data):
     ticket_type = TicketType.query.get_or_404(data['ticket_type_id'])
     
-    if not ticket_type.is_available():
+    if not ticket_type.is_on_sale():
         return jsonify({'error': 'Ticket type not available'}), 400
     
-    if data['quantity'] > ticket_type.get_available_quantity():
-        return jsonify({'error': 'Insufficient tickets available'}), 400
-    
     # Get or create cart
     user = get_user()
-    if user:
-        cart = Cart.query.filter_by(user_id=user.id).first()
-    else:
-        session_id = request.headers.get('X-Session-ID') or request.cookies.get('session_id')
-        cart = Cart.query.filter_by(session_id=session_id).first() if session_id else None
+    session_id = request.headers.get('X-Session-ID') or request.cookies.get('session_id')
+    cart = load_cart(user, session_id)
     
     if not cart:
-        cart = Cart(user_id=user.id if user else None)
-        db.session.add(cart)
-        db.session.flush()
+        cart = new_cart(user, session_id)
+    elif isinstance(cart, Cart):
+        cart.updated_at = datetime.utcnow()
+    
+    # Hold the tickets for this cart; fails atomically if stock runs out
+    if not hold_tickets(cart.id, ticket_type.id, data['quantity']):
+        db.session.rollback()
+        return jsonify({'error': 'Insufficient tickets available'}), 400
+    
+    if isinstance(cart, SessionCart):
+        # Only the hold is written to the database; the cart itself stays in the store
+        db.session.commit()
+        cart.add(ticket_type, data['quantity'])
+        return jsonify(cart.to_dict()), 201
     
     # Check if item already in cart
     existing_item = CartItem.query.filter_by(
@@ -50,10 +93,7 @@ def add_to_cart(data):
     ).first()
     
     if existing_item:
-        new_quantity = existing_item.quantity + data['quantity']
-        if new_quantity > ticket_type.get_available_quantity():
-            return jsonify({'error': 'Insufficient tickets available'}), 400
-        existing_item.quantity = new_quantity
+        existing_item.quantity += data['quantity']
     else:
         cart_item = CartItem(
             cart_id=cart.id,
@@ -69,12 +109,8 @@ def add_to_cart(data):
 
 @tickets_bp.route('/cart', methods=['GET'])
 def get_cart():
-    user = get_user()
-    if user:
-        cart = Cart.query.filter_by(user_id=user.id).first()
-    else:
-        session_id = request.headers.get('X-Session-ID') or request.cookies.get('session_id')
-        cart = Cart.query.filter_by(session_id=session_id).first() if session_id else None
+    session_id = request.headers.get('X-Session-ID') or request.cookies.get('session_id')
+    cart = load_cart(get_user(), session_id)
     
     if not cart:
         return jsonify({'items': [], 'subtotal': 0})
@@ -84,10 +120,21 @@ def get_cart():
 
 @tickets_bp.route('/cart/<int:item_id>', methods=['DELETE'])
 def remove_from_cart(item_id):
+    user = get_user()
+    store = session_cart_store()
+    if store is not None and not user:
+        session_id = request.headers.get('X-Session-ID') or request.cookies.get('session_id')
+        cart = SessionCart.load(store, session_id) if session_id else None
+        if not cart or item_id not in cart.lines:
+            return jsonify({'error': 'Item not found in cart'}), 404
+        release_holds(cart.id, item_id)
+        db.session.commit()
+        cart.remove(item_id)
+        return jsonify({'message': 'Item removed from cart'}), 200
+    
     cart_item = CartItem.query.get_or_404(item_id)
     
     # Verify cart ownership
-    user = get_user()
     if user:
         if cart_item.cart.user_id != user.id:
             return jsonify({'error': 'Unauthorized'}), 403
@@ -96,7 +143,75 @@ def remove_from_cart(item_id):
         if cart_item.cart.session_id != session_id:
             return jsonify({'error': 'Unauthorized'}), 403
     
+    release_holds(cart_item.cart_id, cart_item.ticket_type_id)
+    cart_item.cart.updated_at = datetime.utcnow()
     db.session.delete(cart_item)
     db.session.commit()
     return jsonify({'message': 'Item removed from cart'}), 200
 
+
+
+@tickets_bp.route('/events/<int:event_id>/check-in', methods=['POST'])
+@require_admin
+@validate_request(ScanSchema)
+def check_in(data, event_id):
+    """Check in one scanned ticket at the door"""
+    result = check_in_tickets(event_id, [(data['code'], data.get('scanned_at'))])[0]
+    db.session.commit()
+    return jsonify(result), CHECK_IN_STATUS_CODES[result['status']]
+
+
+@tickets_bp.route('/events/<int:event_id>/check-in/batch', methods=['POST'])
+@require_admin
+@validate_request(ScanBatchSchema)
+def check_in_batch(data, event_id):
+    """Check in scans collected by a scanner that was offline"""
+    results = check_in_tickets(event_id, [(scan['code'], scan.get('scanned_at')) for scan in data['scans']])
+    db.session.commit()
+    
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return jsonify({'results': results, 'summary': summary})
+
+
+@tickets_bp.route('/events/<int:event_id>/check-in/manifest', methods=['GET'])
+@require_admin
+def get_check_in_manifest(event_id):
+    """Binary ticket manifest for offline scanners (full, delta via ?since=, or ?format=bloom)"""
+    Event.query.get_or_404(event_id)
+    
+    since = request.args.get('since', type=int)
+    if 'since' in request.args and since is None:
+        return jsonify({'error': 'since must be a manifest version'}), 400
+    
+    version = manifest_version()
+    headers = {'X-Manifest-Version': str(version), 'Cache-Control': 'no-store'}
+    if request.args.get('format') == 'bloom':
+        return Response(build_bloom_manifest(event_id, version), mimetype='application/octet-stream', headers=headers)
+    return Response(
+        stream_with_context(stream_manifest(event_id, version, since)),
+        mimetype='application/octet-stream',
+        headers=headers
+    )
+
+
+@tickets_bp.route('/tickets/qr/<key>.png', methods=['GET'])
+def get_ticket_qr(key):
+    """Serve a ticket's QR image from the content-addressed render cache"""
+    if not QR_KEY_RE.match(key):
+        return jsonify({'error': 'Not found'}), 404
+    
+    path = qr_path(key)
+    if not os.path.exists(path):
+        # Not pre-rendered (or the cache was cleared): render it now
+        ticket = Ticket.query.filter_by(qr_code_url=request.path).first()
+        if not ticket:
+            return jsonify({'error': 'Not found'}), 404
+        path = ensure_qr(ticket.ticket_code)
+    
+    # The URL changes whenever the image would, so it can be cached indefinitely
+    response = send_file(path, mimetype='image/png', etag=key, max_age=current_app.config['QR_CACHE_MAX_AGE'])
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -1,5 +1,5 @@
-from app.utils.auth import generate_token, verify_token, get_current_user
+from app.utils.auth import generate_token, verify_token, get_current_user, get_current_identity
 from app.utils.validation import validate_request
 
-__all__ = ['generate_token', 'verify_token', 'get_current_user', 'validate_request']
+__all__ = ['generate_token', 'verify_token', 'get_current_user', 'get_current_identity', 'validate_request']
 
@@ -0,0 +1,191 @@
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import delete, distinct, func, insert, literal_column
+from app.models import db, Order, OrderItem, SalesDaily
+from app.utils.rollups import get_rollup
+
+
+GRANULARITIES = ('hour', 'day', 'week')
+MAX_HOURLY_RANGE = timedelta(days=31)
+
+# Orders whose updated_at falls this close before the watermark are re-read,
+# covering transactions that committed just after a refresh started
+WATERMARK_MARGIN = timedelta(minutes=2)
+
+
+def refresh_sales_daily():
+    """Rebuild SalesDaily rows for completed days whose paid sales may have changed.
+
+    Dirty days are the days since the last refresh plus any earlier day with an
+    order created or updated since then. Today is never stored; queries merge
+    it in live.
+    """
+    rollup = get_rollup()
+    started = datetime.utcnow()
+    today = started.date()
+    watermark = rollup.sales_refreshed_at
+
+    changed = db.session.query(_truncate(Order.created_at, 'day')).distinct()
+    days = set()
+    if watermark is None:
+        queries = [changed]
+    else:
+        since = watermark - WATERMARK_MARGIN
+        # Two queries rather than an OR, each a range scan on its own index;
+        # today's orders are dropped below rather than in SQL for the same reason
+        queries = [changed.filter(Order.created_at >= since), changed.filter(Order.updated_at >= since)]
+        day = watermark.date()
+        while day < today:
+            days.add(day)
+            day += timedelta(days=1)
+    for query in queries:
+        for (value,) in query.all():
+            if value is not None and _to_datetime(value).date() < today:
+                days.add(_to_datetime(value).date())
+
+    for day in sorted(days):
+        _rebuild_day(day)
+
+    rollup.sales_refreshed_at = started
+    db.session.commit()
+    return len(days)
+
+
+def _rebuild_day(day):
+    db.session.execute(delete(SalesDaily).where(SalesDaily.day == day))
+    rows = _paid_sales(_day_start(day), _day_start(day + timedelta(days=1))).group_by(
+        OrderItem.event_id, OrderItem.ticket_type_id
+    ).with_entities(*_measures()).all()
+    if rows:
+        db.session.execute(insert(SalesDaily), [
+            {
+                'day': day,
+                'event_id': event_id,
+                'ticket_type_id': ticket_type_id,
+                'orders_count': orders,
+                'tickets_sold': tickets or 0,
+                'revenue': revenue or 0,
+            }
+            for event_id, ticket_type_id, orders, tickets, revenue in rows
+        ])
+
+
+def sales_series(granularity, start, end, event_id=None, ticket_type_id=None, group_by=None):
+    """Revenue, tickets sold and order counts per time bucket.
+
+    Completed days come from SalesDaily; anything after the last refresh (and
+    every hourly bucket) is aggregated live from orders. Order counts are per
+    slice: an order spanning several ticket types counts once for each.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'granularity must be one of {", ".join(GRANULARITIES)}')
+    if end <= start:
+        raise ValueError('end must be after start')
+
+    rows = []
+    live_from = start
+    if granularity != 'hour':
+        # Daily rows cover whole days, so align the range to them
+        start = live_from = _day_start(start.date())
+        refreshed_at = get_rollup().sales_refreshed_at
+        if refreshed_at is not None:
+            live_from = max(start, _day_start(refreshed_at.date()))
+            stored = SalesDaily.query.filter(
+                SalesDaily.day >= start.date(),
+                SalesDaily.day < live_from.date()
+            )
+            if event_id:
+                stored = stored.filter(SalesDaily.event_id == event_id)
+            if ticket_type_id:
+                stored = stored.filter(SalesDaily.ticket_type_id == ticket_type_id)
+            rows.extend(
+                (_day_start(r.day), r.event_id, r.ticket_type_id, r.orders_count, r.tickets_sold, r.revenue)
+                for r in stored.all()
+            )
+    elif end - start > MAX_HOURLY_RANGE:
+        raise ValueError('hourly ranges are limited to 31 days')
+
+    if live_from < end:
+        unit = 'hour' if granularity == 'hour' else 'day'
+        bucket = _truncate(Order.created_at, unit)
+        live = _paid_sales(live_from, end)
+        if event_id:
+            live = live.filter(OrderItem.event_id == event_id)
+        if ticket_type_id:
+            live = live.filter(OrderItem.ticket_type_id == ticket_type_id)
+        live = live.group_by(bucket, OrderItem.event_id, OrderItem.ticket_type_id).with_entities(
+            bucket, *_measures()
+        )
+        rows.extend((_to_datetime(b), *rest) for b, *rest in live.all())
+
+    return _merge(rows, granularity, group_by)
+
+
+def _merge(rows, granularity, group_by):
+    series = {}
+    for bucket, event_id, ticket_type_id, orders, tickets, revenue in rows:
+        if granularity == 'week':
+            bucket = _day_start(bucket.date() - timedelta(days=bucket.weekday()))
+        key = (bucket, event_id if group_by == 'event' else None,
+               ticket_type_id if group_by == 'ticket_type' else None)
+        entry = series.setdefault(key, {'orders': 0, 'tickets_sold': 0, 'revenue': 0.0})
+        entry['orders'] += orders or 0
+        entry['tickets_sold'] += int(tickets or 0)
+        entry['revenue'] += float(revenue or 0)
+
+    results = []
+    for (bucket, event_id, ticket_type_id), entry in sorted(series.items(), key=lambda kv: (kv[0][0], kv[0][1] or 0, kv[0][2] or 0)):
+        item = {'bucket': bucket.isoformat()}
+        if group_by == 'event':
+            item['event_id'] = event_id
+        if group_by == 'ticket_type':
+            item['ticket_type_id'] = ticket_type_id
+        entry['revenue'] = round(entry['revenue'], 2)
+        item.update(entry)
+        results.append(item)
+    return results
+
+
+def _paid_sales(start, end):
+    return db.session.query(OrderItem).join(Order, Order.id == OrderItem.order_id).filter(
+        Order.status == 'paid',
+        Order.created_at >= start,
+        Order.created_at < end
+    )
+
+
+def _measures():
+    return (
+        OrderItem.event_id,
+        OrderItem.ticket_type_id,
+        func.count(distinct(Order.id)),
+        func.sum(OrderItem.quantity),
+        func.sum(OrderItem.quantity * OrderItem.unit_price),
+    )
+
+
+def _truncate(column, unit):
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        if unit == 'hour':
+            return func.strftime('%Y-%m-%d %H:00:00', column)
+        return func.date(column)
+    if dialect == 'postgresql':
+        return func.date_trunc(unit, column)
+    if dialect == 'mssql':
+        # DATETRUNC needs SQL Server 2022; whole units since the epoch work on
+        # any version. Literals, not binds, so GROUP BY matches the SELECT.
+        part, epoch = literal_column(unit), literal_column('0')
+        return func.dateadd(part, func.datediff(part, epoch, column), epoch)
+    raise NotImplementedError(f'sales analytics do not support the {dialect} dialect')
+
+
+def _day_start(day):
+    return datetime.combine(day, time.min)
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return _day_start(value)
+    return datetime.fromisoformat(value)
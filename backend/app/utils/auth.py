@@ -1,11 +1,20 @@
+from collections import namedtuple
 from functools import wraps
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, g, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
 import jwt
+import threading
+import time
 from datetime import datetime, timedelta
-from app.models import User
+from app.models import db, User
+from app.utils.cache import LRUCache
 
 
-def generate_token(user_id, is_refresh=False):
+Identity = namedtuple('Identity', ['id', 'role'])
+
+
+def generate_token(user_id, is_refresh=False, role=None, token_version=0):
     """Generate JWT token"""
     config = current_app.config
     expiration = config['JWT_REFRESH_EXPIRATION_DELTA'] if is_refresh else config['JWT_EXPIRATION_DELTA']
@@ -14,8 +23,11 @@ def generate_token(user_id, is_refresh=False):
         'user_id': user_id,
         'exp': datetime.utcnow() + timedelta(seconds=expiration),
         'iat': datetime.utcnow(),
-        'type': 'refresh' if is_refresh else 'access'
+        'type': 'refresh' if is_refresh else 'access',
+        'ver': token_version or 0
     }
+    if role and not is_refresh:
+        payload['role'] = role
     
     return jwt.encode(
         payload,
@@ -40,30 +52,196 @@ def verify_token(token):
         return None
 
 
-def get_current_user():
-    """Get current user from JWT token in Authorization header"""
+def _user_cache():
+    """Process-level cache of user rows, or None when USER_CACHE_SIZE is 0"""
+    if not current_app.config.get('USER_CACHE_SIZE'):
+        return None
+    cache = current_app.extensions.get('user_cache')
+    if cache is None:
+        cache = current_app.extensions['user_cache'] = LRUCache(
+            maxsize=current_app.config['USER_CACHE_SIZE'],
+            ttl=current_app.config['USER_CACHE_TTL']
+        )
+    return cache
+
+
+def load_user(user_id):
+    """Load a user by id, serving column values from the process cache when enabled"""
+    cache = _user_cache()
+    if cache is None:
+        return db.session.get(User, user_id)
+    
+    values = cache.get(user_id)
+    if values is not None:
+        user = User(**values)
+        make_transient_to_detached(user)
+        # Attach to this request's session without a SELECT
+        return db.session.merge(user, load=False)
+    
+    user = db.session.get(User, user_id)
+    if user:
+        cache.set(user_id, {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    return user
+
+
+def invalidate_user(user_id):
+    """Drop a user from the process cache after it changes"""
+    cache = _user_cache()
+    if cache is not None:
+        cache.delete(user_id)
+
+
+class TokenVersionTable:
+    """In-memory copy of users.token_version, refreshed every `refresh_interval` seconds.
+
+    Only users who have revoked tokens (version > 0) are kept, so the table
+    stays small. Tokens whose `ver` claim is below the current version are rejected.
+    """
+    
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._versions = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+    
+    def current_version(self, user_id):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+            self.refresh()
+        return self._versions.get(user_id, 0)
+    
+    def refresh(self):
+        rows = db.session.query(User.id, User.token_version).filter(User.token_version > 0).all()
+        with self._lock:
+            self._versions = dict(rows)
+            self._loaded_at = time.monotonic()
+    
+    def update(self, user_id, version):
+        with self._lock:
+            if version:
+                self._versions[user_id] = version
+            else:
+                self._versions.pop(user_id, None)
+
+
+def _token_versions():
+    table = current_app.extensions.get('token_versions')
+    if table is None:
+        table = current_app.extensions['token_versions'] = TokenVersionTable(
+            current_app.config['JWT_REVOCATION_REFRESH_INTERVAL']
+        )
+    return table
+
+
+@event.listens_for(User, 'before_update')
+def _revoke_on_credential_change(mapper, connection, target):
+    # A new role or password must not ride on claims issued before it.
+    # Rehashing the same password at a new work factor is not a change.
+    rehashed = target.__dict__.pop('_rehashing_password', False)
+    state = inspect(target)
+    password_changed = state.attrs.password_hash.history.has_changes() and not rehashed
+    if state.attrs.role.history.has_changes() or password_changed:
+        if not state.attrs.token_version.history.has_changes():
+            target.revoke_tokens()
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_cached_user(mapper, connection, target):
+    if has_app_context():
+        invalidate_user(target.id)
+        # Applied to the version table and cache once committed; dropped on rollback
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault('changed_users', {})[target.id] = target.token_version
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_user_changes(session):
+    changed = session.info.pop('changed_users', None)
+    if changed and has_app_context():
+        table = current_app.extensions.get('token_versions')
+        for user_id, version in changed.items():
+            invalidate_user(user_id)
+            if table is not None:
+                table.update(user_id, version)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_changes(session):
+    session.info.pop('changed_users', None)
+
+
+def _current_payload():
+    """Decode the bearer access token once per request"""
+    if '_token_payload' in g:
+        return g._token_payload
+    
+    payload = None
     auth_header = request.headers.get('Authorization')
-    if not auth_header:
+    if auth_header:
+        try:
+            token = auth_header.split(' ')[1]  # Bearer <token>
+            payload = verify_token(token)
+        except (IndexError, AttributeError):
+            payload = None
+    if payload and payload.get('type') != 'access':
+        payload = None
+    
+    g._token_payload = payload
+    return payload
+
+
+def get_current_user():
+    """Get current user from JWT token in Authorization header.
+
+    The result is memoized on the request context, so decorators and the view
+    share a single token decode and user lookup.
+    """
+    if '_current_user' not in g:
+        g._current_user = _resolve_current_user()
+    return g._current_user
+
+
+def _resolve_current_user():
+    payload = _current_payload()
+    if not payload:
         return None
     
-    try:
-        token = auth_header.split(' ')[1]  # Bearer <token>
-        payload = verify_token(token)
-        if not payload or payload.get('type') != 'access':
-            return None
-        
-        user = User.query.get(payload['user_id'])
-        return user
-    except (IndexError, AttributeError):
+    user = load_user(payload['user_id'])
+    if not user or payload.get('ver', 0) < (user.token_version or 0):
         return None
+    return user
+
+
+def get_current_identity():
+    """Get the caller's (id, role).
+
+    With JWT_CLAIMS_AUTH enabled this is read from the token claims and checked
+    against the token version table, without touching the users table.
+    Otherwise it falls back to get_current_user().
+    """
+    if '_current_identity' in g:
+        return g._current_identity
+    
+    identity = None
+    payload = _current_payload()
+    if current_app.config.get('JWT_CLAIMS_AUTH') and payload and 'role' in payload:
+        if payload.get('ver', 0) >= _token_versions().current_version(payload['user_id']):
+            identity = Identity(payload['user_id'], payload['role'])
+    else:
+        user = get_current_user()
+        if user:
+            identity = Identity(user.id, user.role)
+    
+    g._current_identity = identity
+    return identity
 
 
 def require_auth(f):
     """Decorator to require authentication"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user = get_current_user()
-        if not user:
+        if not get_current_identity():
             return jsonify({'error': 'Authentication required'}), 401
         return f(*args, **kwargs)
     return decorated_function
@@ -74,9 +252,8 @@ def require_admin(f):
     @wraps(f)
     @require_auth
     def decorated_function(*args, **kwargs):
-        user = get_current_user()
-        if not user or user.role != 'admin':
+        identity = get_current_identity()
+        if not identity or identity.role != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
         return f(*args, **kwargs)
     return decorated_function
-
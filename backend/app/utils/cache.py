@@ -0,0 +1,65 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with per-entry TTL and hit/miss counters"""
+
+    def __init__(self, maxsize=1024, ttl=60, on_evict=None, lock=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # on_evict(key, value) runs under the lock whenever an entry is
+        # dropped other than by clear(): expired, pushed out, replaced or deleted
+        self.on_evict = on_evict
+        self._data = OrderedDict()
+        self._lock = lock or threading.Lock()
+
+    def _evict(self, key, entry):
+        if self.on_evict is not None:
+            self.on_evict(key, entry[1])
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                    self._evict(key, entry)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._evict(key, previous)
+            self._data[key] = (expires, value)
+            while len(self._data) > self.maxsize:
+                self._evict(*self._data.popitem(last=False))
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                self._evict(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
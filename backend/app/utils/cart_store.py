@@ -0,0 +1,356 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from flask import current_app
+from app.models import db, Cart, TicketType
+from app.models.cart import CartSnapshot
+
+
+# Fraction of writes that also drop expired carts (memory and SQLite backends)
+PRUNE_PROBABILITY = 0.001
+
+
+class MemoryCartBackend:
+    """Carts in a dict in this process; for development and single-process servers"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._carts = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id):
+        """Return (created timestamp, {ticket_type_id: (quantity, unit price)}), or None"""
+        with self._lock:
+            cart = self._carts.get(session_id)
+            if cart is None or cart['expires'] < time.time() or not cart['lines']:
+                return None
+            return cart['created'], dict(cart['lines'])
+
+    def add(self, session_id, ticket_type_id, quantity, unit_price):
+        now = time.time()
+        with self._lock:
+            cart = self._carts.get(session_id)
+            if cart is None or cart['expires'] < now:
+                cart = self._carts[session_id] = {'created': now, 'lines': {}}
+            held, price = cart['lines'].get(ticket_type_id, (0, str(unit_price)))
+            cart['lines'][ticket_type_id] = (held + quantity, price)
+            cart['expires'] = now + self.ttl
+            if random.random() < PRUNE_PROBABILITY:
+                for key in [key for key, value in self._carts.items() if value['expires'] < now]:
+                    del self._carts[key]
+
+    def remove(self, session_id, ticket_type_id):
+        with self._lock:
+            cart = self._carts.get(session_id)
+            if cart is None or cart['expires'] < time.time():
+                return False
+            return cart['lines'].pop(ticket_type_id, None) is not None
+
+    def take(self, session_id):
+        """Remove the cart and return what load() would have; None if another caller got it first"""
+        with self._lock:
+            cart = self._carts.pop(session_id, None)
+            if cart is None or cart['expires'] < time.time() or not cart['lines']:
+                return None
+            return cart['created'], cart['lines']
+
+    def delete(self, session_id):
+        with self._lock:
+            self._carts.pop(session_id, None)
+
+
+class SQLiteCartBackend:
+    """Carts in a local SQLite file shared by every worker process on the host.
+
+    Kept apart from the main database, so browsing shoppers don't queue
+    behind checkouts for its write lock.
+    """
+
+    def __init__(self, path, ttl, timeout=1.0):
+        self.path = path
+        self.ttl = ttl
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cart_lines ('
+                'session_id TEXT NOT NULL, ticket_type_id INTEGER NOT NULL, quantity INTEGER NOT NULL, '
+                'unit_price TEXT NOT NULL, created REAL NOT NULL, expires REAL NOT NULL, '
+                'PRIMARY KEY (session_id, ticket_type_id))'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_cart_lines_expires ON cart_lines (expires)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id):
+        rows = self._connect().execute(
+            'SELECT ticket_type_id, quantity, unit_price, created FROM cart_lines '
+            'WHERE session_id = ? AND expires >= ? ORDER BY created, ticket_type_id',
+            (session_id, time.time())
+        ).fetchall()
+        if not rows:
+            return None
+        return rows[0][3], {ticket_type_id: (quantity, price) for ticket_type_id, quantity, price, _ in rows}
+
+    def add(self, session_id, ticket_type_id, quantity, unit_price):
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM cart_lines WHERE session_id = ? AND expires < ?', (session_id, now))
+            conn.execute(
+                'INSERT INTO cart_lines (session_id, ticket_type_id, quantity, unit_price, created, expires) '
+                'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (session_id, ticket_type_id) '
+                'DO UPDATE SET quantity = quantity + excluded.quantity',
+                (session_id, ticket_type_id, quantity, str(unit_price), now, now + self.ttl)
+            )
+            # The whole cart stays alive while any of it is being used
+            conn.execute('UPDATE cart_lines SET expires = ? WHERE session_id = ?', (now + self.ttl, session_id))
+            if random.random() < PRUNE_PROBABILITY:
+                conn.execute('DELETE FROM cart_lines WHERE expires < ?', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def remove(self, session_id, ticket_type_id):
+        return self._connect().execute(
+            'DELETE FROM cart_lines WHERE session_id = ? AND ticket_type_id = ? AND expires >= ?',
+            (session_id, ticket_type_id, time.time())
+        ).rowcount == 1
+
+    def take(self, session_id):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            data = self.load(session_id)
+            conn.execute('DELETE FROM cart_lines WHERE session_id = ?', (session_id,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return data
+
+    def delete(self, session_id):
+        self._connect().execute('DELETE FROM cart_lines WHERE session_id = ?', (session_id,))
+
+
+class RedisCartBackend:
+    """Carts as Redis hashes shared by every app server; needs the redis package.
+
+    Each cart is one hash ("cart:<session id>") with a quantity and a price
+    field per ticket type. Writes run as MULTI/EXEC blocks that also renew
+    the key's TTL, so Redis expires abandoned carts by itself.
+    """
+
+    def __init__(self, url, ttl, client=None):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(session_id):
+        return f'cart:{session_id}'
+
+    def load(self, session_id):
+        return self._parse(self.client.hgetall(self._key(session_id)))
+
+    @staticmethod
+    def _parse(fields):
+        lines = {
+            int(field[2:]): (int(value), fields.get(f'p:{field[2:]}'))
+            for field, value in fields.items() if field.startswith('q:')
+        }
+        if not lines:
+            return None
+        return float(fields.get('created') or time.time()), dict(sorted(lines.items()))
+
+    def add(self, session_id, ticket_type_id, quantity, unit_price):
+        key = self._key(session_id)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hsetnx(key, 'created', time.time())
+        pipe.hincrby(key, f'q:{ticket_type_id}', quantity)
+        pipe.hsetnx(key, f'p:{ticket_type_id}', str(unit_price))
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def remove(self, session_id, ticket_type_id):
+        return self.client.hdel(self._key(session_id), f'q:{ticket_type_id}', f'p:{ticket_type_id}') > 0
+
+    def take(self, session_id):
+        key = self._key(session_id)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(key)
+        pipe.delete(key)
+        fields, _ = pipe.execute()
+        return self._parse(fields)
+
+    def delete(self, session_id):
+        self.client.delete(self._key(session_id))
+
+
+def _from_timestamp(created):
+    return datetime.fromtimestamp(created, timezone.utc).replace(tzinfo=None)
+
+
+BACKENDS = {
+    'memory': lambda config: MemoryCartBackend(config['CART_IDLE_TTL']),
+    'sqlite': lambda config: SQLiteCartBackend(config['CART_STORE_PATH'], config['CART_IDLE_TTL']),
+    'redis': lambda config: RedisCartBackend(config['CART_STORE_REDIS_URL'], config['CART_IDLE_TTL']),
+}
+
+
+class SessionCartItem:
+    """A line of a SessionCart, with the attributes of a CartItem"""
+
+    def __init__(self, cart_id, ticket_type, quantity, unit_price):
+        # One line per ticket type, so the ticket type id doubles as the item id
+        self.id = ticket_type.id
+        self.cart_id = cart_id
+        self.ticket_type_id = ticket_type.id
+        self.ticket_type = ticket_type
+        self.quantity = quantity
+        self.unit_price = unit_price
+
+    def get_subtotal(self):
+        return float(self.unit_price * self.quantity)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'cart_id': self.cart_id,
+            'ticket_type_id': self.ticket_type_id,
+            'ticket_type': self.ticket_type.to_dict(),
+            'quantity': self.quantity,
+            'unit_price': float(self.unit_price),
+            'subtotal': self.get_subtotal(),
+        }
+
+
+class SessionCart:
+    """An anonymous cart kept in the session cart store rather than the database.
+
+    Its id is the session id, which is also what its inventory holds are
+    keyed by. It only reaches the database as an order, at checkout.
+    """
+
+    user_id = None
+
+    def __init__(self, store, session_id, created_at=None, lines=None):
+        self.store = store
+        self.id = self.session_id = session_id
+        self.created_at = created_at
+        self.lines = lines or {}
+
+    @classmethod
+    def load(cls, store, session_id):
+        data = store.load(session_id)
+        if data is None:
+            return None
+        created, lines = data
+        return cls(store, session_id, _from_timestamp(created), lines)
+
+    def add(self, ticket_type, quantity):
+        self.store.add(self.session_id, ticket_type.id, quantity, ticket_type.price)
+        created, self.lines = self.store.load(self.session_id)
+        self.created_at = _from_timestamp(created)
+
+    def remove(self, item_id):
+        return self.store.remove(self.session_id, item_id)
+
+    def claim(self):
+        """Take the cart out of the store for checkout. False if another request already has.
+
+        The lines become whatever was claimed, which may differ from those
+        loaded earlier if the cart changed in between.
+        """
+        data = self.store.take(self.session_id)
+        if data is None:
+            return False
+        created, self.lines = data
+        self.created_at = _from_timestamp(created)
+        return True
+
+    def restore(self):
+        """Put a claimed cart's lines back after a checkout that didn't go through"""
+        for ticket_type_id, (quantity, price) in self.lines.items():
+            self.store.add(self.session_id, ticket_type_id, quantity, price)
+
+    def snapshot(self):
+        """Load the lines' ticket types in one query; the subtotal is summed here"""
+        ticket_types = {}
+        if self.lines:
+            ticket_types = {tt.id: tt for tt in TicketType.query.filter(TicketType.id.in_(list(self.lines)))}
+        items = [
+            SessionCartItem(self.id, ticket_types[ticket_type_id], quantity, Decimal(price))
+            for ticket_type_id, (quantity, price) in self.lines.items()
+            if ticket_type_id in ticket_types
+        ]
+        return CartSnapshot(items=items, subtotal=sum((item.unit_price * item.quantity for item in items), Decimal(0)))
+
+    def to_dict(self, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        return {
+            'id': self.id,
+            'user_id': None,
+            'session_id': self.session_id,
+            'items': [item.to_dict() for item in snapshot.items],
+            'subtotal': float(snapshot.subtotal),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+def init_cart_store(app):
+    """Set up the CART_STORE backend for anonymous carts ('sql' keeps them as Cart rows)"""
+    kind = app.config['CART_STORE']
+    if kind != 'sql' and kind not in BACKENDS:
+        raise ValueError(f'Unknown CART_STORE {kind!r}; expected sql, {", ".join(BACKENDS)}')
+    store = BACKENDS[kind](app.config) if kind != 'sql' else None
+    app.extensions['cart_store'] = store
+    return store
+
+
+def session_cart_store():
+    return current_app.extensions.get('cart_store')
+
+
+def load_cart(user, session_id):
+    """The visitor's cart, or None if they have none yet.
+
+    Signed-in users always get their Cart row; anonymous visitors get a
+    SessionCart when a session cart store is configured.
+    """
+    if user:
+        return Cart.query.filter_by(user_id=user.id).first()
+    if not session_id:
+        return None
+    store = session_cart_store()
+    if store is None:
+        return Cart.query.filter_by(session_id=session_id).first()
+    return SessionCart.load(store, session_id)
+
+
+def new_cart(user, session_id):
+    """Start a cart for the visitor; a Cart row is added to the session and flushed"""
+    store = session_cart_store()
+    if store is not None and not user:
+        return SessionCart(store, session_id or str(uuid.uuid4()))
+    # An anonymous cart takes the client's session id so later requests find it again
+    cart = Cart(user_id=user.id) if user else Cart(session_id=session_id)
+    db.session.add(cart)
+    db.session.flush()
+    return cart
@@ -0,0 +1,73 @@
+from collections import Counter
+from datetime import datetime, timedelta
+import logging
+import threading
+import time
+from flask import current_app
+from sqlalchemy import delete, select
+from app.models import db, Cart, CartItem
+from app.utils.inventory import release_holds_for_carts
+
+
+logger = logging.getLogger(__name__)
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+
+
+def sweep_abandoned_carts(batch_size=None, max_batches=None):
+    """Delete anonymous carts idle for longer than CART_IDLE_TTL, with their items and holds.
+
+    Works in batches of `batch_size` carts, each in its own short
+    transaction, stopping after `max_batches`; the next run picks up the
+    rest. Every statement re-checks that the cart is still idle, so a
+    visitor who comes back mid-sweep keeps their cart. Returns the counts
+    reclaimed by this run.
+    """
+    batch_size = batch_size or current_app.config['CART_SWEEP_BATCH_SIZE']
+    max_batches = max_batches or current_app.config['CART_SWEEP_MAX_BATCHES']
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['CART_IDLE_TTL'])
+    idle = (Cart.user_id.is_(None), Cart.updated_at < cutoff)
+
+    started = time.perf_counter()
+    reclaimed = Counter()
+    for _ in range(max_batches):
+        candidates = select(Cart.id).where(*idle).order_by(Cart.updated_at).limit(batch_size)
+        if db.session.get_bind().dialect.name != 'sqlite':
+            # Lock the batch so a concurrent add_to_cart waits, and let other sweepers skip it
+            candidates = candidates.with_for_update(skip_locked=True)
+        cart_ids = db.session.execute(candidates).scalars().all()
+        if not cart_ids:
+            break
+
+        still_idle = select(Cart.id).where(Cart.id.in_(cart_ids), *idle)
+        reclaimed['cart_items'] += db.session.execute(
+            delete(CartItem)
+            .where(CartItem.cart_id.in_(still_idle))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        reclaimed['holds'] += release_holds_for_carts(
+            db.session.execute(still_idle).scalars().all()
+        )
+        reclaimed['carts'] += db.session.execute(
+            delete(Cart)
+            .where(Cart.id.in_(cart_ids), *idle)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        reclaimed['batches'] += 1
+
+    elapsed = time.perf_counter() - started
+    if reclaimed['batches']:
+        logger.info('Swept %d abandoned carts (%d items, %d holds) in %d batches, %.2fs',
+                    reclaimed['carts'], reclaimed['cart_items'], reclaimed['holds'], reclaimed['batches'], elapsed)
+    with _metrics_lock:
+        _metrics.update(reclaimed)
+        _metrics['runs'] += 1
+    return dict(reclaimed, seconds=round(elapsed, 3))
+
+
+def sweeper_stats():
+    """Rows reclaimed by sweeps run in this process since it started"""
+    with _metrics_lock:
+        return {key: _metrics[key] for key in ('runs', 'batches', 'carts', 'cart_items', 'holds')}
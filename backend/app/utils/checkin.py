@@ -0,0 +1,140 @@
+from datetime import datetime, timezone
+from sqlalchemy import case, exists, select, update
+from app.models import db, Order, OrderItem, Ticket
+from app.utils.ticket_codes import is_signed_code, verify_code
+
+
+# Tickets on these orders no longer admit anyone
+VOID_ORDER_STATUSES = ('canceled', 'refunded')
+
+# Codes per conditional UPDATE when checking in a batch
+CHUNK_SIZE = 500
+
+
+def check_in_tickets(event_id, scans):
+    """Check in tickets for `event_id` from (code, scanned_at) pairs.
+
+    Each ticket is marked by a conditional UPDATE that only matches an
+    unscanned ticket for this event on a live order, so two gates scanning
+    the same code concurrently can't both succeed. Batches from a scanner
+    that was offline keep their original scan times; a code repeated in one
+    batch counts at its earliest scan. Returns one result dict per scan, in
+    order, with a status of 'checked_in', 'already_checked_in', 'wrong_event',
+    'void', 'forged' or 'not_found'. Signed codes that fail verification or
+    name another event are answered without touching the database.
+    """
+    now = datetime.utcnow()
+    first_scan = {}
+    outcomes = {}
+    for code, scanned_at in scans:
+        if code in outcomes:
+            continue
+        if is_signed_code(code):
+            signed = verify_code(code)
+            if signed is None:
+                outcomes[code] = {'status': 'forged'}
+                continue
+            if signed.event_id != event_id:
+                outcomes[code] = {'status': 'wrong_event'}
+                continue
+        scanned_at = min(_naive_utc(scanned_at) or now, now)
+        if code not in first_scan or scanned_at < first_scan[code]:
+            first_scan[code] = scanned_at
+
+    checked_in = set()
+    codes = list(first_scan)
+    for start in range(0, len(codes), CHUNK_SIZE):
+        checked_in.update(_mark_checked_in(event_id, {
+            code: first_scan[code] for code in codes[start:start + CHUNK_SIZE]
+        }))
+
+    misses = [code for code in codes if code not in checked_in]
+    outcomes.update({code: {'status': 'checked_in', 'checked_in_at': first_scan[code]} for code in checked_in})
+    outcomes.update(_classify(event_id, misses))
+
+    results = []
+    reported = set()
+    for code, _ in scans:
+        outcome = outcomes[code]
+        if code in reported and outcome['status'] == 'checked_in':
+            # Later scans of a code this batch just admitted are repeats
+            outcome = dict(outcome, status='already_checked_in')
+        reported.add(code)
+        results.append(_result(code, outcome))
+    return results
+
+
+def _live_ticket_for(event_id):
+    return exists().where(
+        OrderItem.id == Ticket.order_item_id,
+        OrderItem.event_id == event_id,
+        Order.id == OrderItem.order_id,
+        Order.status.notin_(VOID_ORDER_STATUSES)
+    )
+
+
+def _mark_checked_in(event_id, scan_times):
+    """Mark the eligible tickets among `scan_times` and return their codes"""
+    condition = (
+        Ticket.ticket_code.in_(list(scan_times)),
+        Ticket.checked_in.isnot(True),
+        _live_ticket_for(event_id),
+    )
+    if db.session.get_bind().dialect.update_returning:
+        result = db.session.execute(
+            update(Ticket)
+            .where(*condition)
+            .values(checked_in=True, checked_in_at=case(scan_times, value=Ticket.ticket_code))
+            .returning(Ticket.ticket_code)
+            .execution_options(synchronize_session=False)
+        )
+        return [code for (code,) in result]
+
+    marked = []
+    for code, scanned_at in scan_times.items():
+        result = db.session.execute(
+            update(Ticket)
+            .where(Ticket.ticket_code == code, *condition[1:])
+            .values(checked_in=True, checked_in_at=scanned_at)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            marked.append(code)
+    return marked
+
+
+def _classify(event_id, codes):
+    """Explain why each of `codes` could not be checked in"""
+    outcomes = {code: {'status': 'not_found'} for code in codes}
+    for start in range(0, len(codes), CHUNK_SIZE):
+        rows = db.session.execute(
+            select(Ticket.ticket_code, Ticket.checked_in, Ticket.checked_in_at,
+                   OrderItem.event_id, Order.status)
+            .join(OrderItem, OrderItem.id == Ticket.order_item_id)
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(Ticket.ticket_code.in_(codes[start:start + CHUNK_SIZE]))
+        )
+        for code, is_checked_in, checked_in_at, ticket_event_id, order_status in rows:
+            if ticket_event_id != event_id:
+                outcomes[code] = {'status': 'wrong_event'}
+            elif order_status in VOID_ORDER_STATUSES:
+                outcomes[code] = {'status': 'void'}
+            elif is_checked_in:
+                outcomes[code] = {'status': 'already_checked_in', 'checked_in_at': checked_in_at}
+    return outcomes
+
+
+def _naive_utc(value):
+    # Scanners send offsets; stored timestamps are naive UTC like the rest of the schema
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _result(code, outcome):
+    checked_in_at = outcome.get('checked_in_at')
+    return {
+        'code': code,
+        'status': outcome['status'],
+        'checked_in_at': checked_in_at.isoformat() if checked_in_at else None,
+    }
@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update, delete, select
+from app.models import db, TicketType, InventoryHold
+from app.utils.response_cache import mark_stale
+
+
+def _unheld_stock():
+    return TicketType.quantity_total - TicketType.quantity_sold - TicketType.quantity_held
+
+
+def reserve_tickets(ticket_type_id, quantity):
+    """Atomically mark tickets as sold if enough unheld stock remains.
+
+    The availability check and the increment happen in a single conditional
+    UPDATE, so concurrent checkouts can never push a ticket type past
+    quantity_total. Returns True if the tickets were reserved.
+    """
+    if _claim_sold(ticket_type_id, quantity):
+        return True
+    # As in hold_tickets: free lapsed holds and retry once
+    if not release_expired_holds(ticket_type_id=ticket_type_id):
+        return False
+    return _claim_sold(ticket_type_id, quantity)
+
+
+def hold_tickets(cart_id, ticket_type_id, quantity):
+    """Hold additional tickets for a cart until INVENTORY_HOLD_TTL elapses.
+
+    `cart_id` is a Cart id, or the session id of a cart kept in the session
+    cart store. Returns False without holding anything if not enough stock is left.
+    """
+    if not _claim_held(ticket_type_id, quantity):
+        # Stock may only be tied up in lapsed holds; free those and retry once
+        if not release_expired_holds(ticket_type_id=ticket_type_id):
+            return False
+        if not _claim_held(ticket_type_id, quantity):
+            return False
+
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=current_app.config['INVENTORY_HOLD_TTL'])
+
+    # Extend a live hold in place; an expired one is released and replaced
+    extended = db.session.execute(
+        update(InventoryHold)
+        .where(_held_by(cart_id))
+        .where(InventoryHold.ticket_type_id == ticket_type_id)
+        .where(InventoryHold.expires_at > now)
+        .values(quantity=InventoryHold.quantity + quantity, expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    )
+    if extended.rowcount == 0:
+        release_holds(cart_id, ticket_type_id)
+        db.session.add(InventoryHold(
+            **_holder(cart_id),
+            ticket_type_id=ticket_type_id,
+            quantity=quantity,
+            expires_at=expires_at
+        ))
+    return True
+
+
+def purchase_tickets(cart_id, ticket_type_id, quantity):
+    """Convert a cart's hold into sold tickets.
+
+    A live hold covers up to its own quantity; anything beyond that (or
+    everything, if the hold expired) is reserved from unheld stock.
+    Returns False if the remainder could not be reserved.
+    """
+    now = datetime.utcnow()
+    hold = db.session.execute(
+        select(InventoryHold.id, InventoryHold.quantity, InventoryHold.expires_at)
+        .where(_held_by(cart_id))
+        .where(InventoryHold.ticket_type_id == ticket_type_id)
+    ).first()
+
+    covered = 0
+    if hold and _delete_hold(hold.id, hold.quantity):
+        if hold.expires_at > now:
+            covered = min(hold.quantity, quantity)
+        db.session.execute(
+            update(TicketType)
+            .where(TicketType.id == ticket_type_id)
+            .values(
+                quantity_held=TicketType.quantity_held - hold.quantity,
+                quantity_sold=TicketType.quantity_sold + covered
+            )
+            .execution_options(synchronize_session=False)
+        )
+        mark_stale(f'ticket_type:{ticket_type_id}')
+
+    remainder = quantity - covered
+    if remainder > 0:
+        return reserve_tickets(ticket_type_id, remainder)
+    return True
+
+
+def release_holds(cart_id, ticket_type_id=None):
+    """Release a cart's holds (optionally for one ticket type) back to stock"""
+    query = select(InventoryHold.id, InventoryHold.ticket_type_id, InventoryHold.quantity).where(_held_by(cart_id))
+    if ticket_type_id is not None:
+        query = query.where(InventoryHold.ticket_type_id == ticket_type_id)
+    return _release(db.session.execute(query).all())
+
+
+def release_holds_for_carts(cart_ids):
+    """Release every hold belonging to `cart_ids`. Returns the number released."""
+    if not cart_ids:
+        return 0
+    return _release(db.session.execute(
+        select(InventoryHold.id, InventoryHold.ticket_type_id, InventoryHold.quantity)
+        .where(InventoryHold.cart_id.in_(cart_ids))
+    ).all())
+
+
+def release_expired_holds(ticket_type_id=None, limit=500):
+    """Release up to `limit` expired holds back to stock. Returns the number released."""
+    query = select(InventoryHold.id, InventoryHold.ticket_type_id, InventoryHold.quantity).where(
+        InventoryHold.expires_at <= datetime.utcnow()
+    )
+    if ticket_type_id is not None:
+        query = query.where(InventoryHold.ticket_type_id == ticket_type_id)
+    rows = db.session.execute(query.order_by(InventoryHold.expires_at).limit(limit)).all()
+    return _release(rows)
+
+
+def release_all_expired_holds(batch_size=500, max_batches=20):
+    """Scheduled: release expired holds in batches, committing each. Returns the number released."""
+    released = 0
+    for _ in range(max_batches):
+        count = release_expired_holds(limit=batch_size)
+        db.session.commit()
+        released += count
+        if count < batch_size:
+            break
+    return released
+
+
+def _held_by(cart_id):
+    # Carts in the session cart store have no row; their holds are keyed by session id
+    if isinstance(cart_id, str):
+        return InventoryHold.session_id == cart_id
+    return InventoryHold.cart_id == cart_id
+
+
+def _holder(cart_id):
+    return {'session_id': cart_id} if isinstance(cart_id, str) else {'cart_id': cart_id}
+
+
+def _claim_sold(ticket_type_id, quantity):
+    result = db.session.execute(
+        update(TicketType)
+        .where(TicketType.id == ticket_type_id)
+        .where(_unheld_stock() >= quantity)
+        .values(quantity_sold=TicketType.quantity_sold + quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return _changed(result, ticket_type_id)
+
+
+def _claim_held(ticket_type_id, quantity):
+    result = db.session.execute(
+        update(TicketType)
+        .where(TicketType.id == ticket_type_id)
+        .where(_unheld_stock() >= quantity)
+        .values(quantity_held=TicketType.quantity_held + quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return _changed(result, ticket_type_id)
+
+
+def _delete_hold(hold_id, quantity):
+    # Matching on quantity too means a hold extended concurrently is left alone
+    result = db.session.execute(
+        delete(InventoryHold)
+        .where(InventoryHold.id == hold_id)
+        .where(InventoryHold.quantity == quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _release(rows):
+    released = 0
+    for hold_id, ticket_type_id, quantity in rows:
+        if not _delete_hold(hold_id, quantity):
+            continue
+        db.session.execute(
+            update(TicketType)
+            .where(TicketType.id == ticket_type_id)
+            .values(quantity_held=TicketType.quantity_held - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        mark_stale(f'ticket_type:{ticket_type_id}')
+        released += 1
+    return released
+
+
+def _changed(result, ticket_type_id):
+    # Inventory counts appear in cached event detail responses
+    if result.rowcount != 1:
+        return False
+    mark_stale(f'ticket_type:{ticket_type_id}')
+    return True
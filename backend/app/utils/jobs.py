@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta
+import importlib
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from flask import current_app
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from app.models import db, Job
+
+
+logger = logging.getLogger(__name__)
+
+_TASKS = {}
+
+# Modules whose @task handlers the app enqueues; imported by register_tasks()
+TASK_MODULES = (
+    'app.utils.mail',
+    'app.utils.payments',
+    'app.utils.qr',
+)
+
+
+def task(name):
+    """Register a function as the handler for jobs named `name`.
+
+    Handlers receive the job payload as keyword arguments. Their session work
+    is committed together with the job being marked done, and rolled back
+    if they raise.
+    """
+    def decorator(func):
+        _TASKS[name] = func
+        return func
+    return decorator
+
+
+def register_tasks():
+    """Import every task module, so enqueue() and `flask jobs work` know all handlers"""
+    for module in TASK_MODULES:
+        importlib.import_module(module)
+
+
+def enqueue(task_name, payload=None, idempotency_key=None, delay=0, max_attempts=None):
+    """Add a job to the current transaction; workers see it once that commits.
+
+    If a job with `idempotency_key` already exists it is returned instead of
+    queueing a duplicate. Returns the Job.
+    """
+    if task_name not in _TASKS:
+        raise ValueError(f'Unknown task {task_name!r}')
+    if idempotency_key:
+        existing = Job.query.filter_by(idempotency_key=idempotency_key).first()
+        if existing:
+            return existing
+
+    job = Job(
+        task=task_name,
+        payload=payload or {},
+        status='queued',
+        idempotency_key=idempotency_key,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+        max_attempts=max_attempts or current_app.config['JOB_MAX_ATTEMPTS']
+    )
+    if not idempotency_key:
+        db.session.add(job)
+        return job
+    # A concurrent request may insert the same key first; keep this transaction usable if so
+    try:
+        with db.session.begin_nested():
+            db.session.add(job)
+    except IntegrityError:
+        return Job.query.filter_by(idempotency_key=idempotency_key).one()
+    return job
+
+
+def claim_jobs(worker_id, limit=10):
+    """Claim up to `limit` due jobs for `worker_id` and return them.
+
+    PostgreSQL picks candidates with FOR UPDATE SKIP LOCKED and SQL Server
+    with the equivalent UPDLOCK, READPAST table hint, so concurrent workers
+    skip each other's rows instead of blocking. Elsewhere the conditional
+    UPDATE below is what keeps a claim exclusive: SQLite serializes writers,
+    and on other backends a worker that loses the race claims nothing. Jobs left running past JOB_LOCK_TIMEOUT (a worker
+    died mid-job) are claimed again.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config['JOB_LOCK_TIMEOUT'])
+    ready = or_(
+        and_(Job.status == 'queued', Job.run_at <= now),
+        and_(Job.status == 'running', Job.locked_at < stale)
+    )
+    candidates = select(Job.id).where(ready).order_by(Job.run_at).limit(limit)
+    dialect = db.session.get_bind().dialect
+    if dialect.name == 'mssql':
+        # SQLAlchemy renders no FOR UPDATE on SQL Server; hint the table instead
+        candidates = candidates.with_hint(Job, 'WITH (UPDLOCK, READPAST, ROWLOCK)', 'mssql')
+    elif dialect.name != 'sqlite':
+        candidates = candidates.with_for_update(skip_locked=True)
+
+    claim = (
+        update(Job)
+        .where(ready)
+        .values(status='running', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if dialect.update_returning:
+        result = db.session.execute(claim.where(Job.id.in_(candidates.scalar_subquery())).returning(Job.id))
+        ids = [job_id for (job_id,) in result]
+    else:
+        ids = [
+            job_id for job_id in db.session.execute(candidates).scalars().all()
+            if db.session.execute(claim.where(Job.id == job_id)).rowcount == 1
+        ]
+    db.session.commit()
+
+    if not ids:
+        return []
+    return Job.query.filter(Job.id.in_(ids)).order_by(Job.run_at).all()
+
+
+def run_job(job, worker_id):
+    """Run one claimed job, then mark it done or schedule a retry. Returns True on success."""
+    job_id, task_name, attempts, max_attempts = job.id, job.task, job.attempts, job.max_attempts
+    try:
+        handler = _TASKS.get(task_name)
+        if handler is None:
+            raise LookupError(f'No handler registered for task {task_name!r}')
+        handler(**job.payload)
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc()
+        logger.warning('Job %s (%s) failed on attempt %s', job_id, task_name, attempts, exc_info=True)
+        _record_failure(job_id, worker_id, attempts, max_attempts, error)
+        return False
+
+    db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == worker_id)
+        .values(status='done', finished_at=datetime.utcnow(), locked_by=None, locked_at=None, last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return True
+
+
+def _record_failure(job_id, worker_id, attempts, max_attempts, error):
+    now = datetime.utcnow()
+    if attempts >= max_attempts:
+        values = {'status': 'failed', 'finished_at': now}
+    else:
+        values = {'status': 'queued', 'run_at': now + timedelta(seconds=retry_delay(attempts))}
+    db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == worker_id)
+        .values(locked_by=None, locked_at=None, last_error=error[-4000:], **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, capped at JOB_BACKOFF_MAX seconds"""
+    base = current_app.config['JOB_BACKOFF_BASE'] * 2 ** (attempts - 1)
+    return min(current_app.config['JOB_BACKOFF_MAX'], base) * random.uniform(0.5, 1.0)
+
+
+def work(worker_id=None, burst=False, batch_size=10, poll_interval=1.0, should_stop=lambda: False):
+    """Claim and run jobs until `should_stop()`, or until the queue is empty with `burst`.
+
+    Returns the number of jobs processed.
+    """
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+    processed = 0
+    while not should_stop():
+        jobs = claim_jobs(worker_id, batch_size)
+        for job in jobs:
+            run_job(job, worker_id)
+            processed += 1
+        if not jobs:
+            if burst:
+                break
+            time.sleep(poll_interval)
+    return processed
+
+
+def purge_finished_jobs():
+    """Delete jobs that finished successfully more than JOB_RETENTION_DAYS ago"""
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config['JOB_RETENTION_DAYS'])
+    result = db.session.execute(
+        delete(Job)
+        .where(Job.status == 'done', Job.finished_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,218 @@
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from string import Template
+import logging
+import queue
+import smtplib
+import threading
+import time
+from flask import current_app
+from app.models import Order
+from app.utils.cache import LRUCache
+from app.utils.jobs import task
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Session:
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """SMTP sessions reused across sends by every thread in the process.
+
+    Each send() delivers its messages over one session. Sessions go back to
+    the pool afterwards and are retired after `max_messages` (servers cap
+    messages per session) or once idle for `idle_timeout` seconds.
+    """
+
+    def __init__(self, host, port, use_tls=True, username=None, password=None,
+                 size=4, max_messages=100, idle_timeout=60, timeout=30):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def send(self, messages):
+        """Deliver `messages` and return the recipients refused permanently.
+
+        A session the server dropped is replaced and the message retried once;
+        temporary (4xx) rejections and connection failures raise so the caller
+        can retry later.
+        """
+        refused = []
+        with self._slots:
+            session = self._checkout()
+            try:
+                for message in messages:
+                    if session.sent >= self.max_messages:
+                        self._close(session)
+                        session = self._open()
+                    try:
+                        refused.extend(self._deliver(session, message))
+                    except smtplib.SMTPServerDisconnected:
+                        self._close(session)
+                        session = self._open()
+                        refused.extend(self._deliver(session, message))
+            except BaseException:
+                self._close(session)
+                raise
+            session.last_used = time.monotonic()
+            self._idle.put(session)
+        return refused
+
+    def close(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def _checkout(self):
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if time.monotonic() - session.last_used < self.idle_timeout:
+                return session
+            self._close(session)
+
+    def _open(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password)
+        return _Session(smtp)
+
+    def _deliver(self, session, message):
+        try:
+            refused = list(session.smtp.send_message(message))
+        except smtplib.SMTPRecipientsRefused as exc:
+            refused = list(exc.recipients)
+        except smtplib.SMTPResponseException as exc:
+            if exc.smtp_code < 500:
+                raise
+            logger.error('Message to %s rejected: %s %s', message['To'], exc.smtp_code, exc.smtp_error)
+            refused = [message['To']]
+        session.sent += 1
+        return refused
+
+    @staticmethod
+    def _close(session):
+        try:
+            session.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            session.smtp.close()
+
+
+def get_mail_pool():
+    pool = current_app.extensions.get('mail_pool')
+    if pool is None:
+        config = current_app.config
+        pool = current_app.extensions['mail_pool'] = SMTPPool(
+            config['MAIL_SERVER'],
+            config['MAIL_PORT'],
+            use_tls=config['MAIL_USE_TLS'],
+            username=config['MAIL_USERNAME'],
+            password=config['MAIL_PASSWORD'],
+            size=config['MAIL_POOL_SIZE'],
+            max_messages=config['MAIL_MAX_MESSAGES_PER_CONNECTION'],
+            idle_timeout=config['MAIL_POOL_IDLE_TIMEOUT'],
+            timeout=config['MAIL_TIMEOUT']
+        )
+    return pool
+
+
+def _load_template(name):
+    templates = current_app.extensions.setdefault('mail_templates', {})
+    if name not in templates:
+        with current_app.open_resource(f'templates/email/{name}', 'r') as f:
+            templates[name] = f.read()
+    return templates[name]
+
+
+def _escape(value):
+    # Values filled in by the first pass must not look like placeholders to the second
+    return str(value if value is not None else '').replace('$', '$$')
+
+
+def _event_block(event):
+    """The per-event part of the confirmation, with only ${tickets} left to fill.
+
+    Rendered once per event (until the event is edited) and reused for every
+    order that includes it.
+    """
+    cache = current_app.extensions.get('mail_event_blocks')
+    if cache is None:
+        cache = current_app.extensions['mail_event_blocks'] = LRUCache(maxsize=256, ttl=3600)
+    key = (event.id, event.updated_at)
+    block = cache.get(key)
+    if block is None:
+        block = Template(Template(_load_template('order_confirmation_event.txt')).safe_substitute(
+            event_title=_escape(event.title),
+            event_when=_escape(event.start_datetime.strftime('%a %d %b %Y, %H:%M') if event.start_datetime else 'Date TBA'),
+            event_venue=_escape(event.venue or 'Venue TBA')
+        ))
+        cache.set(key, block)
+    return block
+
+
+def render_order_confirmation(order):
+    """Build the confirmation EmailMessage for an order loaded with its items"""
+    events = {}
+    for item in order.items:
+        lines = events.setdefault(item.event_id, (item.event, []))[1]
+        lines.extend(f'  {ticket.ticket_code}  ({item.ticket_type.name})' for ticket in item.tickets)
+
+    blocks = [_event_block(event).substitute(tickets='\n'.join(lines)) for event, lines in events.values()]
+    holder = next((t.holder_name for item in order.items for t in item.tickets if t.holder_name), None)
+
+    subject, _, body = Template(_load_template('order_confirmation.txt')).substitute(
+        order_number=order.order_number,
+        name=holder or 'there',
+        events='\n'.join(blocks),
+        total=f'{float(order.total):.2f}',
+        currency=order.currency or 'USD'
+    ).partition('\n\n')
+
+    message = EmailMessage()
+    message['Subject'] = subject.removeprefix('Subject: ')
+    message['From'] = current_app.config['MAIL_DEFAULT_SENDER']
+    message['To'] = order.email
+    message['Date'] = formatdate(localtime=False)
+    message['Message-ID'] = make_msgid(domain=current_app.config['MAIL_DEFAULT_SENDER'].rpartition('@')[2] or None)
+    message.set_content(body)
+    return message
+
+
+def send_order_confirmations(order_ids):
+    """Render and send confirmations for `order_ids` over one pooled SMTP session"""
+    orders = Order.query_with_items().filter(Order.id.in_(order_ids)).all()
+    if not orders:
+        return 0
+
+    started = time.perf_counter()
+    messages = [render_order_confirmation(order) for order in orders]
+    refused = get_mail_pool().send(messages)
+    elapsed = time.perf_counter() - started
+    logger.info('Sent %d order confirmations in %.3fs (%.1f msg/s), %d refused',
+                len(messages), elapsed, len(messages) / elapsed if elapsed else 0, len(refused))
+    return len(messages) - len(refused)
+
+
+@task('send_order_confirmation')
+def send_order_confirmation(order_id):
+    """Job: email an order's confirmation; SMTP errors retry with the job's backoff"""
+    send_order_confirmations([order_id])
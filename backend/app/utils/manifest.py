@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+import hashlib
+import math
+import struct
+from sqlalchemy import or_, select
+from app.models import db, Order, OrderItem, Ticket
+from app.utils.checkin import VOID_ORDER_STATUSES
+
+
+MAGIC = b'KTM1'
+KIND_FULL, KIND_DELTA, KIND_BLOOM = 0, 1, 2
+
+# magic, kind, event id, sync version (microseconds since the epoch, UTC)
+HEADER = struct.Struct('>4sBIQ')
+# Bloom header extension: hash count, bit count
+BLOOM_HEADER = struct.Struct('>BI')
+# Truncated ticket code hash followed by a status byte
+RECORD_SIZE = 9
+
+STATUS_VALID, STATUS_CHECKED_IN, STATUS_VOID = 0, 1, 2
+
+# Tickets changed this close before `since` are sent again, covering
+# transactions that committed after the scanner's previous sync started
+SYNC_MARGIN = timedelta(minutes=2)
+
+BLOOM_FP_RATE = 0.001
+FETCH_SIZE = 1000
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def code_hash(code):
+    """8-byte hash a scanner compares against the manifest"""
+    return hashlib.blake2b(code.encode('utf-8'), digest_size=8).digest()
+
+
+def to_version(moment):
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_version(version):
+    return _EPOCH + timedelta(microseconds=version)
+
+
+def manifest_version():
+    """Version to stamp on a manifest; taken before its query runs"""
+    return to_version(datetime.utcnow())
+
+
+def stream_manifest(event_id, version, since=None):
+    """Yield the binary manifest of `event_id`'s tickets, one chunk per fetch.
+
+    Layout is HEADER followed by fixed-size records: an 8-byte code_hash and
+    a status byte (valid, checked in or void). With `since` (a version from an
+    earlier manifest) only tickets or orders changed after it are included,
+    and the scanner upserts them into its copy.
+    """
+    kind = KIND_FULL if since is None else KIND_DELTA
+    yield HEADER.pack(MAGIC, kind, event_id, version)
+
+    chunk = bytearray()
+    for code, checked_in, order_status in _ticket_rows(event_id, since):
+        chunk += code_hash(code)
+        chunk.append(_status(checked_in, order_status))
+        if len(chunk) >= FETCH_SIZE * RECORD_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+
+def build_bloom_manifest(event_id, version):
+    """Bloom filter of the hashes of tickets that still admit someone.
+
+    For scanners too small to hold the record list: no delta support, and a
+    BLOOM_FP_RATE chance of accepting an unknown code.
+    """
+    hashes = [
+        code_hash(code)
+        for code, checked_in, order_status in _ticket_rows(event_id)
+        if _status(checked_in, order_status) == STATUS_VALID
+    ]
+    bits = max(64, math.ceil(-len(hashes) * math.log(BLOOM_FP_RATE) / math.log(2) ** 2))
+    bits += -bits % 8
+    rounds = max(1, round(bits / max(len(hashes), 1) * math.log(2)))
+
+    bloom = bytearray(bits // 8)
+    for digest in hashes:
+        # Double hashing over the two halves of the code hash
+        h1, h2 = struct.unpack('>II', digest)
+        for i in range(rounds):
+            position = (h1 + i * h2) % bits
+            bloom[position >> 3] |= 1 << (position & 7)
+    return HEADER.pack(MAGIC, KIND_BLOOM, event_id, version) + BLOOM_HEADER.pack(rounds, bits) + bytes(bloom)
+
+
+def _ticket_rows(event_id, since=None):
+    query = (
+        select(Ticket.ticket_code, Ticket.checked_in, Order.status)
+        .join(OrderItem, OrderItem.id == Ticket.order_item_id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(OrderItem.event_id == event_id)
+    )
+    if since is not None:
+        changed_after = from_version(since) - SYNC_MARGIN
+        query = query.where(or_(Ticket.updated_at > changed_after, Order.updated_at > changed_after))
+    return db.session.execute(query.execution_options(yield_per=FETCH_SIZE))
+
+
+def _status(checked_in, order_status):
+    if order_status in VOID_ORDER_STATUSES:
+        return STATUS_VOID
+    return STATUS_CHECKED_IN if checked_in else STATUS_VALID
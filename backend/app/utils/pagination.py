@@ -0,0 +1,100 @@
+from collections import namedtuple
+from datetime import datetime
+import base64
+import json
+from sqlalchemy import and_, or_, false
+
+
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor'])
+
+
+def encode_cursor(values):
+    """Encode sort key values as an opaque URL-safe cursor"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor back into values for `columns`. Raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Invalid cursor')
+    return [_decode_value(column, v) for column, v in zip(columns, values)]
+
+
+def _decode_value(column, value):
+    # Cursors come from the client: anything but the type encode_cursor writes is rejected
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise ValueError('Invalid cursor')
+        return datetime.fromisoformat(value)
+    if python_type is int:
+        valid = isinstance(value, int) and not isinstance(value, bool)
+    elif python_type is str:
+        valid = isinstance(value, str)
+    else:
+        valid = isinstance(value, (str, int, float)) and not isinstance(value, bool)
+    if not valid:
+        raise ValueError('Invalid cursor')
+    return value
+
+
+def paginate_keyset(query, order, per_page, cursor=None):
+    """Page through `query` by its sort key instead of OFFSET.
+
+    `order` is a list of (column, descending) pairs that must end in a unique
+    column. NULLs sort last in either direction. Returns a KeysetPage whose
+    next_cursor is None on the last page.
+    """
+    columns = [column for column, _ in order]
+    query = query.order_by(None).order_by(*[
+        (column.desc() if descending else column.asc()).nulls_last()
+        for column, descending in order
+    ])
+    if cursor:
+        query = query.filter(_after(order, decode_cursor(cursor, columns)))
+
+    rows = query.limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+    return KeysetPage(items, next_cursor)
+
+
+def keyset_pagination_info(query, page, per_page, include_total=False):
+    """Pagination block for a keyset response; the exact total is opt-in"""
+    info = {
+        'per_page': per_page,
+        'next_cursor': page.next_cursor,
+    }
+    if include_total:
+        info['total'] = query.order_by(None).count()
+    return info
+
+
+def _after(order, values):
+    """WHERE clause selecting rows that sort strictly after `values`"""
+    clauses = []
+    for i, (column, descending) in enumerate(order):
+        value = values[i]
+        if value is None:
+            # Nothing sorts after NULL on this column
+            beyond = false()
+        else:
+            beyond = column < value if descending else column > value
+            if column.expression.nullable:
+                beyond = or_(beyond, column.is_(None))
+        prefix = [
+            prev.is_(None) if values[j] is None else prev == values[j]
+            for j, (prev, _) in enumerate(order[:i])
+        ]
+        clauses.append(and_(*prefix, beyond))
+    return or_(*clauses)
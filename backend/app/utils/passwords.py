@@ -0,0 +1,61 @@
+import threading
+import bcrypt
+from flask import current_app, has_app_context
+
+
+DEFAULT_ROUNDS = 12
+
+
+class PasswordHashBusy(Exception):
+    """Every hashing slot stayed taken for PASSWORD_HASH_TIMEOUT seconds"""
+
+
+def _slots():
+    """Caps concurrent bcrypt work in this process at PASSWORD_HASH_WORKERS"""
+    slots = current_app.extensions.get('password_hash_slots')
+    if slots is None:
+        slots = current_app.extensions.setdefault(
+            'password_hash_slots', threading.BoundedSemaphore(current_app.config['PASSWORD_HASH_WORKERS'])
+        )
+    return slots
+
+
+def _run(func, *args):
+    # The hash runs on the calling thread, which waits for it either way. bcrypt
+    # releases the GIL, so other requests keep running; the slots stop a login
+    # rush from queueing more hashes than there are cores to run them.
+    if not has_app_context():
+        return func(*args)
+    slots = _slots()
+    if not slots.acquire(timeout=current_app.config['PASSWORD_HASH_TIMEOUT']):
+        raise PasswordHashBusy()
+    try:
+        return func(*args)
+    finally:
+        slots.release()
+
+
+def _configured_rounds():
+    if has_app_context():
+        return current_app.config['BCRYPT_ROUNDS']
+    return DEFAULT_ROUNDS
+
+
+def hash_password(password):
+    """Hash a password with the configured BCRYPT_ROUNDS. Raises PasswordHashBusy when saturated."""
+    salt = bcrypt.gensalt(rounds=_configured_rounds())
+    return _run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+
+def verify_password(password, password_hash):
+    """Check a password against a bcrypt hash. Raises PasswordHashBusy when saturated."""
+    return _run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def needs_rehash(password_hash):
+    """True if the hash was made with a different cost than BCRYPT_ROUNDS"""
+    try:
+        rounds = int(password_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != _configured_rounds()
@@ -0,0 +1,208 @@
+from datetime import datetime, timedelta, timezone
+import hashlib
+import hmac
+import logging
+import time
+from flask import current_app
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import db, Order, PaymentEvent
+from app.utils.jobs import enqueue, retry_delay, task
+
+
+logger = logging.getLogger(__name__)
+
+# Event type -> (required order status, new order status)
+TRANSITIONS = {
+    'payment_intent.succeeded': ('pending', 'paid'),
+    'payment_intent.canceled': ('pending', 'canceled'),
+    'charge.refunded': ('paid', 'refunded'),
+}
+
+
+class SignatureError(ValueError):
+    pass
+
+
+def verify_stripe_signature(payload, header, secret, tolerance=300):
+    """Check a Stripe-Signature header ("t=...,v1=...") against the raw request body"""
+    timestamp, signatures = None, []
+    for part in (header or '').split(','):
+        key, _, value = part.strip().partition('=')
+        if key == 't':
+            timestamp = value
+        elif key == 'v1':
+            signatures.append(value)
+    if not timestamp or not timestamp.isdigit() or not signatures:
+        raise SignatureError('Malformed signature header')
+
+    expected = hmac.new(secret.encode('utf-8'), timestamp.encode('ascii') + b'.' + payload, hashlib.sha256).hexdigest()
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise SignatureError('Signature mismatch')
+    if abs(time.time() - int(timestamp)) > tolerance:
+        raise SignatureError('Timestamp outside the tolerance window')
+
+
+def record_event(provider, event):
+    """Store a webhook event unless it was seen before. Returns True if it is new.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING where supported, so concurrent
+    redeliveries of one event can't both be recorded.
+    """
+    obj = event.get('data', {}).get('object', {})
+    intent_id = obj.get('id') if obj.get('object') == 'payment_intent' else obj.get('payment_intent')
+    values = {
+        'provider': provider,
+        'event_id': event['id'],
+        'event_type': event['type'],
+        'payment_intent_id': intent_id,
+        'payload': event,
+        'provider_created_at': datetime.fromtimestamp(event['created'], timezone.utc).replace(tzinfo=None) if event.get('created') else None,
+    }
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        result = db.session.execute(
+            insert(PaymentEvent).values(**values).on_conflict_do_nothing(index_elements=['provider', 'event_id'])
+        )
+        return result.rowcount == 1
+
+    if db.session.query(PaymentEvent.id).filter_by(provider=provider, event_id=event['id']).first():
+        return False
+    db.session.add(PaymentEvent(**values))
+    return True
+
+
+def apply_payment_events(limit=None):
+    """Apply up to `limit` received events to their orders in one transaction.
+
+    Events are claimed with a conditional UPDATE (skipping rows locked by
+    other workers on PostgreSQL), ordered by the provider's timestamp, and
+    their orders loaded in one query. Order changes go through the ORM so
+    rollups and updated_at follow. An event that finds its order in the
+    wrong state (a refund ahead of its payment) stays 'received' and is
+    retried with backoff, up to PAYMENT_EVENT_MAX_ATTEMPTS times. Returns
+    the number of events processed.
+    """
+    limit = limit or current_app.config['PAYMENT_EVENT_BATCH_SIZE']
+    events = _claim_events(limit)
+    if not events:
+        return 0
+
+    intents = {event.payment_intent_id for event in events if event.payment_intent_id}
+    orders = {order.payment_intent_id: order for order in Order.query.filter(Order.payment_intent_id.in_(intents))}
+    # Orders not yet linked to their intent carry the order number in the intent's metadata
+    unlinked = {_order_number(event): event.payment_intent_id for event in events
+                if event.payment_intent_id not in orders and _order_number(event)}
+    if unlinked:
+        for order in Order.query.filter(Order.order_number.in_(list(unlinked))):
+            if order.payment_intent_id is None:
+                order.payment_intent_id = unlinked[order.order_number]
+                order.payment_provider = 'stripe'
+                orders[order.payment_intent_id] = order
+
+    now = datetime.utcnow()
+    max_attempts = current_app.config['PAYMENT_EVENT_MAX_ATTEMPTS']
+    results, next_retry = [], None
+    for event in events:
+        status, error = _apply(event, orders.get(event.payment_intent_id))
+        result = {'id': event.id, 'status': status, 'error': error, 'processed_at': now,
+                  'attempts': event.attempts + 1, 'retry_at': None}
+        if status == 'received':
+            # The order isn't in the state this event follows yet; its predecessor may still arrive
+            if result['attempts'] >= max_attempts:
+                result['status'] = 'ignored'
+            else:
+                delay = retry_delay(result['attempts'])
+                result.update(processed_at=None, retry_at=now + timedelta(seconds=delay))
+                next_retry = min(next_retry, delay) if next_retry is not None else delay
+        results.append(result)
+    db.session.flush()
+    db.session.execute(update(PaymentEvent), results)
+    if next_retry is not None:
+        schedule_payment_events(delay=next_retry)
+    db.session.commit()
+    return len(events)
+
+
+def schedule_payment_events(delay=0):
+    """Queue an apply_payment_events job for the batch window `delay` seconds from now.
+
+    Windows are PAYMENT_EVENT_BATCH_DELAY seconds long and their job runs
+    when the window closes, so a burst of webhooks shares one job. If the
+    window's job has already started, the next window's is used.
+    """
+    window = current_app.config['PAYMENT_EVENT_BATCH_DELAY']
+    now = time.time()
+    slot = int((now + delay) // window)
+    for slot in (slot, slot + 1):
+        job = enqueue('apply_payment_events', idempotency_key=f'apply_payment_events:{window:g}:{slot}',
+                      delay=(slot + 1) * window - now)
+        if job.status == 'queued':
+            break
+    return job
+
+
+def _claim_events(limit):
+    due = (PaymentEvent.status == 'received',
+           or_(PaymentEvent.retry_at.is_(None), PaymentEvent.retry_at <= datetime.utcnow()))
+    candidates = select(PaymentEvent.id).where(*due).order_by(PaymentEvent.id).limit(limit)
+    dialect = db.session.get_bind().dialect
+    if dialect.name != 'sqlite':
+        candidates = candidates.with_for_update(skip_locked=True)
+
+    claim = (
+        update(PaymentEvent)
+        .where(*due)
+        .values(status='processing')
+        .execution_options(synchronize_session=False)
+    )
+    if dialect.update_returning:
+        result = db.session.execute(claim.where(PaymentEvent.id.in_(candidates.scalar_subquery())).returning(PaymentEvent.id))
+        ids = [event_id for (event_id,) in result]
+    else:
+        ids = [
+            event_id for event_id in db.session.execute(candidates).scalars().all()
+            if db.session.execute(claim.where(PaymentEvent.id == event_id)).rowcount == 1
+        ]
+    if not ids:
+        return []
+    return PaymentEvent.query.filter(PaymentEvent.id.in_(ids)).order_by(
+        PaymentEvent.provider_created_at, PaymentEvent.id
+    ).all()
+
+
+def _order_number(event):
+    return event.payload.get('data', {}).get('object', {}).get('metadata', {}).get('order_number')
+
+
+def _apply(event, order):
+    transition = TRANSITIONS.get(event.event_type)
+    if transition is None:
+        return 'ignored', 'Unhandled event type'
+    if order is None:
+        return 'ignored', 'No order for this payment intent'
+
+    source, target = transition
+    if order.status == target:
+        return 'applied', None
+    if order.status != source:
+        # Left for a retry rather than dropped: events can arrive out of order
+        return 'received', f'Order is {order.status}, expected {source}'
+
+    if target == 'paid':
+        received = event.payload['data']['object'].get('amount_received')
+        if received is not None and received < round(float(order.total) * 100):
+            logger.warning('Payment for order %s is short: %s < %s', order.order_number, received, order.total)
+            return 'ignored', 'Amount received is less than the order total'
+    order.status = target
+    return 'applied', None
+
+
+@task('apply_payment_events')
+def apply_payment_events_job():
+    """Job: drain received payment events batch by batch"""
+    batch_size = current_app.config['PAYMENT_EVENT_BATCH_SIZE']
+    while apply_payment_events(batch_size) == batch_size:
+        pass
@@ -0,0 +1,108 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from flask import current_app, url_for
+from sqlalchemy import select
+from app.models import db, OrderItem, Ticket
+from app.utils.jobs import task
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when the rendering below changes so cached images are not reused
+RENDER_VERSION = 'png-m-8-4'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class QRRenderBusy(Exception):
+    """A QR image did not render within QR_RENDER_TIMEOUT seconds"""
+
+
+def qr_key(code):
+    """Content address of a code's QR image.
+
+    A plain digest of the ticket code: the code is the unguessable part, and
+    nothing here changes when SECRET_KEY is rotated.
+    """
+    return hashlib.sha256(f'{RENDER_VERSION}:{code}'.encode('utf-8')).hexdigest()[:32]
+
+
+def qr_code_url(code):
+    return url_for('tickets.get_ticket_qr', key=qr_key(code))
+
+
+def qr_path(key):
+    return os.path.join(current_app.config['QR_CACHE_DIR'], key[:2], f'{key}.png')
+
+
+def render_qr(code, path):
+    """Render `code` as a PNG at `path`. Runs in the QR process pool."""
+    import segno
+
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    segno.make(code, error='m').save(tmp, kind='png', scale=8, border=4)
+    os.replace(tmp, path)
+    return path
+
+
+def _pool():
+    """Process pool for rendering; spawned, so workers never inherit server threads"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=current_app.config['QR_RENDER_WORKERS'],
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+    return _executor
+
+
+@task('render_order_qr_codes')
+def render_order_qr_codes(order_id):
+    """Job: render the QR images for an order's tickets.
+
+    One bad code doesn't stop the rest; the job fails afterwards so a retry
+    picks up whatever is still missing (rendered images are skipped).
+    """
+    codes = db.session.execute(
+        select(Ticket.ticket_code)
+        .join(OrderItem, OrderItem.id == Ticket.order_item_id)
+        .where(OrderItem.order_id == order_id)
+    ).scalars().all()
+    failed = 0
+    for code in codes:
+        try:
+            render_qr(code, qr_path(qr_key(code)))
+        except Exception:
+            failed += 1
+            logger.warning('QR render failed for a ticket in order %s', order_id, exc_info=True)
+    if failed:
+        raise RuntimeError(f'{failed} of {len(codes)} QR images failed to render for order {order_id}')
+
+
+def ensure_qr(code):
+    """Return the cached image path for `code`, rendering it first if needed.
+
+    Raises QRRenderBusy when the render pool doesn't finish in time.
+    """
+    path = qr_path(qr_key(code))
+    if not os.path.exists(path):
+        future = _pool().submit(render_qr, code, path)
+        try:
+            future.result(timeout=current_app.config['QR_RENDER_TIMEOUT'])
+        except TimeoutError:
+            # Still queued behind other renders: give the slot back. One that
+            # already started finishes into the cache for the retry.
+            future.cancel()
+            raise QRRenderBusy()
+    return path
+
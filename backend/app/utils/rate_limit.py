@@ -0,0 +1,123 @@
+import logging
+import math
+import random
+import sqlite3
+import threading
+import time
+from flask import jsonify, request
+
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Fraction of requests that also prune fully refilled buckets
+PRUNE_PROBABILITY = 0.001
+
+
+def parse_limit(limit):
+    """Parse '10/minute' into (capacity, tokens refilled per second)"""
+    try:
+        count, period = limit.split('/')
+        capacity = int(count)
+        seconds = PERIODS[period.strip()]
+    except (ValueError, KeyError):
+        raise ValueError(f'Invalid rate limit {limit!r}; expected e.g. "10/minute"')
+    if capacity <= 0:
+        raise ValueError(f'Invalid rate limit {limit!r}; count must be positive')
+    return capacity, capacity / seconds
+
+
+class BucketStore:
+    """Token buckets in a local SQLite file shared by every worker process.
+
+    Each take() runs in a BEGIN IMMEDIATE transaction, so concurrent workers
+    serialize on the file's write lock instead of racing on the same bucket.
+    """
+
+    def __init__(self, path, timeout=1.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS buckets ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_buckets_full_at ON buckets (full_at)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, rate, now=None):
+        """Take one token from `key`. Returns (allowed, seconds until a token is free)."""
+        now = time.time() if now is None else now
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)',
+                (key, tokens, now, now + (capacity - tokens) / rate)
+            )
+            if random.random() < PRUNE_PROBABILITY:
+                conn.execute('DELETE FROM buckets WHERE full_at < ?', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def clear(self):
+        self._connect().execute('DELETE FROM buckets')
+
+
+def _client_key():
+    # The real client behind a proxy once TRUSTED_PROXIES is set (ProxyFix in create_app)
+    return request.remote_addr or 'unknown'
+
+
+def init_rate_limiter(app):
+    """Reject requests over their endpoint's RATE_LIMITS policy with a 429.
+
+    Runs as a before_request hook, ahead of request parsing, the database and
+    bcrypt. Buckets are keyed by endpoint and client address.
+    """
+    if not app.config.get('RATE_LIMIT_ENABLED'):
+        return None
+
+    policies = {endpoint: parse_limit(limit) for endpoint, limit in app.config['RATE_LIMITS'].items()}
+    if not policies:
+        return None
+    store = BucketStore(app.config['RATE_LIMIT_STORAGE'])
+
+    @app.before_request
+    def enforce_rate_limit():
+        policy = policies.get(request.endpoint)
+        if policy is None or request.method == 'OPTIONS':
+            return None
+        try:
+            allowed, retry_after = store.take(f'{request.endpoint}:{_client_key()}', *policy)
+        except sqlite3.Error:
+            # Fail open: a stuck limiter must not take the endpoint down with it
+            logger.warning('Rate limiter unavailable', exc_info=True)
+            return None
+        if allowed:
+            return None
+        response = jsonify({'error': 'Too many requests, please try again later'})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    app.extensions['rate_limiter'] = store
+    return store
@@ -0,0 +1,153 @@
+from collections import namedtuple
+from functools import wraps
+from urllib.parse import urlencode
+import hashlib
+import threading
+from flask import request, current_app, make_response, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.models import db, Event, TicketType
+from app.utils.auth import get_current_identity
+from app.utils.cache import LRUCache
+
+
+CachedResponse = namedtuple('CachedResponse', ['body', 'mimetype', 'etag'])
+
+
+class ResponseCache:
+    """LRU response cache whose entries can be invalidated by tag"""
+
+    def __init__(self, maxsize=512, ttl=60):
+        # One reentrant lock covers the entries and the tag index, so the
+        # eviction callback can prune tags while the LRU holds the lock
+        self._lock = threading.RLock()
+        self._tags = {}
+        self.entries = LRUCache(maxsize=maxsize, ttl=ttl, on_evict=self._forget, lock=self._lock)
+
+    def _forget(self, key, stored):
+        for tag in stored[1]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        stored = self.entries.get(key)
+        return None if stored is None else stored[0]
+
+    def set(self, key, value, tags=()):
+        tags = tuple(set(tags))
+        with self._lock:
+            self.entries.set(key, (value, tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def invalidate(self, *tags):
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.pop(tag, ()))
+            for key in keys:
+                self.entries.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._tags.clear()
+            self.entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.entries.stats(), tags=len(self._tags),
+                        tagged_keys=sum(len(keys) for keys in self._tags.values()))
+
+
+def get_response_cache():
+    """Response cache for this app, or None when RESPONSE_CACHE_SIZE is 0"""
+    if not current_app.config.get('RESPONSE_CACHE_SIZE'):
+        return None
+    cache = current_app.extensions.get('response_cache')
+    if cache is None:
+        cache = current_app.extensions['response_cache'] = ResponseCache(
+            maxsize=current_app.config['RESPONSE_CACHE_SIZE'],
+            ttl=current_app.config['RESPONSE_CACHE_TTL']
+        )
+    return cache
+
+
+def mark_stale(*tags, session=None):
+    """Invalidate cache tags once the current transaction commits"""
+    session = session or db.session()
+    session.info.setdefault('stale_cache_tags', set()).update(tags)
+
+
+def cached_response(tags):
+    """Cache a JSON GET view per (endpoint, view args, normalized query string, caller role).
+
+    `tags` maps the response payload to the tags the entry is invalidated by.
+    Responses carry a strong ETag and `If-None-Match` is answered with 304.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            cache = get_response_cache()
+            if cache is None:
+                return f(*args, **kwargs)
+
+            identity = get_current_identity()
+            query_string = urlencode(sorted(request.args.items(multi=True)))
+            key = (request.endpoint, tuple(sorted(kwargs.items())), query_string,
+                   identity.role if identity else 'anonymous')
+
+            entry = cache.get(key)
+            status = 'HIT'
+            if entry is None:
+                status = 'MISS'
+                rv = make_response(f(*args, **kwargs))
+                if rv.status_code != 200 or not rv.is_json:
+                    return rv
+                body = rv.get_data()
+                entry = CachedResponse(body, rv.mimetype, hashlib.sha256(body).hexdigest()[:32])
+                cache.set(key, entry, tags=tags(rv.get_json()))
+
+            if request.if_none_match.contains(entry.etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+            response.set_etag(entry.etag)
+            response.headers['X-Cache'] = status
+            response.headers['Cache-Control'] = 'no-cache'
+            response.vary.add('Authorization')
+            return response
+        return decorated_function
+    return decorator
+
+
+@event.listens_for(Event, 'after_insert')
+@event.listens_for(Event, 'after_update')
+@event.listens_for(Event, 'after_delete')
+def _event_changed(mapper, connection, target):
+    mark_stale('event-list', f'event:{target.id}', session=object_session(target))
+
+
+@event.listens_for(TicketType, 'after_insert')
+@event.listens_for(TicketType, 'after_update')
+@event.listens_for(TicketType, 'after_delete')
+def _ticket_type_changed(mapper, connection, target):
+    # Ticket prices feed the list's price filter
+    mark_stale('event-list', f'event:{target.event_id}', f'ticket_type:{target.id}',
+               session=object_session(target))
+
+
+@event.listens_for(Session, 'after_commit')
+def _flush_stale_tags(session):
+    tags = session.info.pop('stale_cache_tags', None)
+    if tags and has_app_context():
+        cache = current_app.extensions.get('response_cache')
+        if cache is not None:
+            cache.invalidate(*tags)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_stale_tags(session):
+    session.info.pop('stale_cache_tags', None)
@@ -0,0 +1,127 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import event, func, update
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
+from app.models import db, Order, Event, NewsPost, User, StatsRollup
+
+
+ROLLUP_ID = 1
+
+
+def get_rollup():
+    """Return the stats rollup row, building it from the base tables if missing"""
+    rollup = db.session.get(StatsRollup, ROLLUP_ID)
+    if rollup is None:
+        rollup = reconcile_rollups()
+    return rollup
+
+
+def reconcile_rollups():
+    """Recompute every counter from the base tables and overwrite the rollup row"""
+    rollup = db.session.get(StatsRollup, ROLLUP_ID)
+    if rollup is None:
+        rollup = StatsRollup(id=ROLLUP_ID)
+        db.session.add(rollup)
+
+    rollup.orders_total = Order.query.count()
+    rollup.revenue_total = db.session.query(func.sum(Order.total)).filter(
+        Order.status == 'paid'
+    ).scalar() or 0
+    rollup.events_total = Event.query.count()
+    rollup.events_published = Event.query.filter_by(status='published').count()
+    rollup.news_total = NewsPost.query.count()
+    rollup.news_published = NewsPost.query.filter_by(status='published').count()
+    rollup.users_total = User.query.count()
+    rollup.reconciled_at = datetime.utcnow()
+
+    # Deltas recorded before this point are already reflected in the counts
+    db.session.info.pop('stats_deltas', None)
+    db.session.commit()
+    return rollup
+
+
+def _record(target, **deltas):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('stats_deltas', Counter()).update(deltas)
+
+
+def _previous(target, attr):
+    added, unchanged, deleted = get_history(target, attr)
+    return deleted[0] if deleted else getattr(target, attr)
+
+
+def _paid_revenue(status, total):
+    return (total or 0) if status == 'paid' else 0
+
+
+@event.listens_for(Order, 'after_insert')
+def _order_inserted(mapper, connection, target):
+    _record(target, orders_total=1, revenue_total=_paid_revenue(target.status, target.total))
+
+
+@event.listens_for(Order, 'after_update')
+def _order_updated(mapper, connection, target):
+    before = _paid_revenue(_previous(target, 'status'), _previous(target, 'total'))
+    after = _paid_revenue(target.status, target.total)
+    if before != after:
+        _record(target, revenue_total=after - before)
+
+
+@event.listens_for(Order, 'after_delete')
+def _order_deleted(mapper, connection, target):
+    _record(target, orders_total=-1, revenue_total=-_paid_revenue(target.status, target.total))
+
+
+def _track_published(model, total_key, published_key):
+    @event.listens_for(model, 'after_insert')
+    def inserted(mapper, connection, target):
+        _record(target, **{total_key: 1, published_key: int(target.status == 'published')})
+
+    @event.listens_for(model, 'after_update')
+    def updated(mapper, connection, target):
+        delta = int(target.status == 'published') - int(_previous(target, 'status') == 'published')
+        if delta:
+            _record(target, **{published_key: delta})
+
+    @event.listens_for(model, 'after_delete')
+    def deleted(mapper, connection, target):
+        _record(target, **{total_key: -1, published_key: -int(target.status == 'published')})
+
+
+_track_published(Event, 'events_total', 'events_published')
+_track_published(NewsPost, 'news_total', 'news_published')
+
+
+@event.listens_for(User, 'after_insert')
+def _user_inserted(mapper, connection, target):
+    _record(target, users_total=1)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    _record(target, users_total=-1)
+
+
+@event.listens_for(Session, 'before_commit')
+def _apply_deltas(session):
+    # Flush first so the final flush's changes are counted, then apply them in
+    # one UPDATE at the end of the transaction to keep the row lock short
+    session.flush()
+    deltas = session.info.pop('stats_deltas', None)
+    if not deltas:
+        return
+    values = {key: getattr(StatsRollup, key) + delta for key, delta in deltas.items() if delta}
+    if values:
+        session.execute(
+            update(StatsRollup)
+            .where(StatsRollup.id == ROLLUP_ID)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_deltas(session):
+    session.info.pop('stats_deltas', None)
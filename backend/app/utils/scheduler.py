@@ -0,0 +1,49 @@
+import atexit
+import logging
+from apscheduler.schedulers.background import BackgroundScheduler
+from app.models import db
+
+
+logger = logging.getLogger(__name__)
+
+
+def init_scheduler(app):
+    """Start the background scheduler for periodic maintenance jobs.
+
+    Every job runs inside an app context and must be idempotent: under
+    gunicorn each worker process runs its own scheduler.
+    """
+    if not app.config.get('SCHEDULER_ENABLED') or app.testing:
+        return None
+    
+    from app.utils.rollups import reconcile_rollups
+    from app.utils.analytics import refresh_sales_daily
+    from app.utils.jobs import purge_finished_jobs
+    from app.utils.carts import sweep_abandoned_carts
+    from app.utils.inventory import release_all_expired_holds
+    
+    scheduler = BackgroundScheduler(daemon=True)
+    
+    def add_job(func, seconds):
+        def run():
+            with app.app_context():
+                try:
+                    func()
+                except Exception:
+                    logger.exception('Scheduled job %s failed', func.__name__)
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+        scheduler.add_job(run, 'interval', seconds=seconds, id=func.__name__,
+                          max_instances=1, coalesce=True)
+    
+    add_job(reconcile_rollups, app.config['ROLLUP_RECONCILE_INTERVAL'])
+    add_job(refresh_sales_daily, app.config['SALES_ROLLUP_INTERVAL'])
+    add_job(purge_finished_jobs, app.config['JOB_PURGE_INTERVAL'])
+    add_job(sweep_abandoned_carts, app.config['CART_SWEEP_INTERVAL'])
+    add_job(release_all_expired_holds, app.config['INVENTORY_HOLD_RELEASE_INTERVAL'])
+    
+    scheduler.start()
+    atexit.register(lambda: scheduler.shutdown(wait=False))
+    app.extensions['scheduler'] = scheduler
+    return scheduler
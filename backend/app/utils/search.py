@@ -0,0 +1,62 @@
+import re
+from flask import current_app
+from sqlalchemy import column, func, inspect, literal, select, table, text
+from app.models import db, Event
+
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_events(query, q):
+    """Filter an Event query by the `q` search string, ranked by relevance.
+
+    Uses the FTS5 index on SQLite and the tsvector GIN index on PostgreSQL,
+    with prefix matching on every term. Other backends (or a SQLite database
+    created before the index existed) fall back to LIKE matching.
+    Returns (query, ranked).
+    """
+    terms = _TOKEN_RE.findall(q.lower())
+    if not terms:
+        return query, False
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite' and _has_fts_table():
+        fts = table('events_fts', column('rowid'), column('rank'))
+        match = ' '.join(f'"{term}"*' for term in terms)
+        hits = (
+            select(fts.c.rowid.label('event_id'), fts.c.rank.label('rank'))
+            .where(text('events_fts MATCH :fts_query').bindparams(fts_query=match))
+            .subquery()
+        )
+        # FTS5 rank is bm25: lower is more relevant
+        return query.join(hits, Event.id == hits.c.event_id).order_by(hits.c.rank.asc()), True
+
+    if dialect == 'postgresql':
+        # Must match the ix_events_search expression for the index to be used
+        vector = func.to_tsvector(
+            literal('english'),
+            func.coalesce(Event.title, '').op('||')(' ').op('||')(func.coalesce(Event.description, ''))
+        )
+        tsquery = func.to_tsquery(literal('english'), ' & '.join(f'{term}:*' for term in terms))
+        return (
+            query.filter(vector.op('@@')(tsquery))
+            .order_by(func.ts_rank(vector, tsquery).desc()),
+            True
+        )
+
+    return like_search(query, q), False
+
+
+def like_search(query, q):
+    """The unindexed fallback: substring match on title or description"""
+    return query.filter(
+        (Event.title.contains(q)) |
+        (Event.description.contains(q))
+    )
+
+
+def _has_fts_table():
+    cached = current_app.extensions.get('events_fts')
+    if cached is None:
+        cached = current_app.extensions['events_fts'] = inspect(db.engine).has_table('events_fts')
+    return cached
@@ -0,0 +1,225 @@
+import json
+import uuid
+from functools import lru_cache
+import sqlalchemy as sa
+from flask import current_app, request
+from sqlalchemy.orm import load_only
+from app.models import Event, MediaAsset, NewsPost, Order, OrderItem, Ticket, TicketType, User
+
+
+class ModelSerializer:
+    """Turns model instances into the dicts their to_dict() builds, without the per-field Python.
+
+    The function is generated once from the mapper's columns: datetimes
+    become isoformat() strings, Numeric values floats and everything else is
+    passed through. `extra` adds computed fields, each a function of the
+    instance, and `requires` names the columns an extra field reads.
+    `deferred` fields are left out of list views unless asked for.
+    Calling the serializer serializes one instance.
+    """
+
+    def __init__(self, model, fields=None, exclude=(), extra=None, deferred=(), requires=None):
+        self.model = model
+        columns = [attr for attr in sa.inspect(model).column_attrs if attr.key not in exclude]
+        if fields is not None:
+            by_key = {attr.key: attr for attr in columns}
+            columns = [by_key[key] for key in fields]
+        self._columns = columns
+        self._extra = extra or {}
+        self._requires = requires or {}
+        self.fields = tuple([attr.key for attr in columns] + list(self._extra))
+        self.default_fields = tuple(field for field in self.fields if field not in deferred)
+        self._serialize = self._compile(columns, self._extra)
+        # Compiled once per distinct field set; bounded since the sets come from query strings
+        self._subset = lru_cache(maxsize=64)(self._compile_subset)
+
+    def only(self, fields):
+        """A serializer producing just `fields`"""
+        wanted = set(fields)
+        key = tuple(field for field in self.fields if field in wanted)
+        return self if key == self.fields else self._subset(key)
+
+    def _compile_subset(self, fields):
+        return ModelSerializer(
+            self.model,
+            fields=[attr.key for attr in self._columns if attr.key in fields],
+            extra={key: func for key, func in self._extra.items() if key in fields}
+        )
+
+    def load_only(self, fields, *also):
+        """Query option loading only the columns `fields` need, the primary key and `also`"""
+        wanted = set(fields)
+        for field in fields:
+            wanted.update(self._requires.get(field, ()))
+        mapper = sa.inspect(self.model)
+        attributes = [getattr(self.model, attr.key) for attr in self._columns if attr.key in wanted]
+        attributes += [getattr(self.model, column.key) for column in mapper.primary_key]
+        return load_only(*attributes, *also)
+
+    def _compile(self, columns, extra):
+        name = f'serialize_{self.model.__name__.lower()}'
+        namespace = {}
+        entries = []
+        for i, attr in enumerate(columns):
+            column_type = attr.columns[0].type
+            if isinstance(column_type, (sa.DateTime, sa.Date, sa.Time)):
+                value = f'v{i}.isoformat() if v{i} is not None else None'
+            elif isinstance(column_type, sa.Numeric):
+                value = f'float(v{i}) if v{i} is not None else None'
+            else:
+                value = f'v{i}'
+            entries.append(f'        {attr.key!r}: {value},')
+        for i, (key, func) in enumerate(extra.items()):
+            namespace[f'extra{i}'] = func
+            entries.append(f'        {key!r}: extra{i}(obj),')
+        body = ['    return {', *entries, '    }']
+
+        # Loaded column values sit in the instance __dict__; reading them there skips
+        # the attribute descriptors. Expired or deferred ones go through getattr.
+        source = '\n'.join([
+            f'def {name}_loaded(obj):',
+            '    state = obj.__dict__',
+            *[f'    v{i} = state[{attr.key!r}]' for i, attr in enumerate(columns)],
+            *body,
+            f'def {name}_attributes(obj):',
+            *[f'    v{i} = obj.{attr.key}' for i, attr in enumerate(columns)],
+            *body,
+            f'def {name}(obj):',
+            '    try:',
+            f'        return {name}_loaded(obj)',
+            '    except KeyError:',
+            f'        return {name}_attributes(obj)',
+        ])
+        exec(compile(source, f'<serializer {self.model.__name__}>', 'exec'), namespace)
+        return namespace[name]
+
+    def __call__(self, obj):
+        return self._serialize(obj)
+
+    def many(self, objs):
+        serialize = self._serialize
+        return [serialize(obj) for obj in objs]
+
+
+def _related(obj, attribute):
+    # Eager-loaded relationships are in __dict__ too; anything else lazy-loads as usual
+    state = obj.__dict__
+    return state[attribute] if attribute in state else getattr(obj, attribute)
+
+
+def _optional(serializer, attribute):
+    def serialize_related(obj):
+        related = _related(obj, attribute)
+        return serializer(related) if related is not None else None
+    return serialize_related
+
+
+def _collection(serializer, attribute):
+    def serialize_collection(obj):
+        return serializer.many(_related(obj, attribute))
+    return serialize_collection
+
+
+serialize_user = ModelSerializer(User, fields=['id', 'email', 'first_name', 'last_name', 'role', 'created_at'])
+serialize_ticket_type = ModelSerializer(TicketType, exclude=('created_at', 'updated_at'), extra={
+    'quantity_available': TicketType.get_available_quantity,
+    'is_available': TicketType.is_available,
+})
+serialize_ticket = ModelSerializer(Ticket, exclude=('updated_at',))
+serialize_event = ModelSerializer(Event, deferred=('description',))
+serialize_media_asset = ModelSerializer(MediaAsset)
+serialize_news_post = ModelSerializer(NewsPost, extra={'author': _optional(serialize_user, 'author')},
+                                      deferred=('content',), requires={'author': ('author_id',)})
+serialize_order_item = ModelSerializer(OrderItem, extra={
+    'event': _optional(serialize_event, 'event'),
+    'ticket_type': _optional(serialize_ticket_type, 'ticket_type'),
+    'subtotal': OrderItem.get_subtotal,
+    'tickets': _collection(serialize_ticket, 'tickets'),
+})
+serialize_order = ModelSerializer(Order, extra={'items': _collection(serialize_order_item, 'items')})
+
+
+def requested_fields(serializer, extra=(), default=None):
+    """Field names from the request's `fields=` parameter, else `default` (the serializer's defaults).
+
+    `extra` names fields the view adds itself. Raises ValueError on unknown
+    or missing names.
+    """
+    value = request.args.get('fields')
+    if value is None:
+        return tuple(default if default is not None else serializer.default_fields)
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    if not fields:
+        raise ValueError('fields must name at least one field')
+    unknown = [field for field in fields if field not in serializer.fields and field not in extra]
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+    return fields
+
+
+def _dumps_json(obj):
+    return json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('ascii')
+
+
+def _dumps_orjson(obj):
+    import orjson
+
+    encoded = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    # orjson writes UTF-8 where jsonify escapes; keep responses byte-identical
+    return encoded if encoded.isascii() else _dumps_json(obj)
+
+
+def _orjson_available():
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_json_encoder():
+    """The JSON_ENCODER backend: a function from payload to the bytes jsonify() would send"""
+    encoder = current_app.extensions.get('json_encoder')
+    if encoder is None:
+        name = current_app.config['JSON_ENCODER']
+        if name == 'auto':
+            name = 'orjson' if _orjson_available() else 'json'
+        if name not in ('json', 'orjson'):
+            raise ValueError(f'Unknown JSON_ENCODER {name!r}; expected auto, json or orjson')
+        encoder = current_app.extensions['json_encoder'] = _dumps_orjson if name == 'orjson' else _dumps_json
+    return encoder
+
+
+def json_list_response(items, serialize, key=None, **envelope):
+    """Respond with `serialize(item)` for each of `items` as a JSON array, bare or as `key` in `envelope`.
+
+    The body matches jsonify() byte for byte (compact, sorted keys). Lists
+    longer than JSON_STREAM_THRESHOLD are sent as a chunked stream, encoded
+    JSON_STREAM_CHUNK_SIZE items at a time, so the encoded body is not built
+    as one string. That only holds for endpoints without @cached_response,
+    which buffers the whole body to store it. Items are serialized up front
+    either way: the database session is gone by the time the stream is read.
+    In debug mode this defers to jsonify's indented output.
+    """
+    payload = [serialize(item) for item in items]
+    if current_app.debug:
+        return current_app.json.response({key: payload, **envelope} if key else payload)
+
+    dumps = get_json_encoder()
+    mimetype = current_app.json.mimetype
+    if len(payload) <= current_app.config['JSON_STREAM_THRESHOLD']:
+        body = dumps({key: payload, **envelope} if key else payload)
+        return current_app.response_class(body + b'\n', mimetype=mimetype)
+
+    # Encode the envelope around a placeholder, then stream the array into its place
+    marker = f'__items_{uuid.uuid4().hex}__'
+    head, _, tail = dumps({key: marker, **envelope} if key else marker).partition(dumps(marker))
+    chunk_size = current_app.config['JSON_STREAM_CHUNK_SIZE']
+
+    def generate():
+        yield head + b'['
+        for start in range(0, len(payload), chunk_size):
+            yield (b',' if start else b'') + dumps(payload[start:start + chunk_size])[1:-1]
+        yield b']' + tail + b'\n'
+
+    return current_app.response_class(generate(), mimetype=mimetype)
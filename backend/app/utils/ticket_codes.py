@@ -0,0 +1,114 @@
+from collections import namedtuple
+import base64
+import hashlib
+import hmac
+import os
+import struct
+from flask import current_app
+from app.config import DEV_SECRET_KEY
+
+
+SIGNED_PREFIX = 'TKS-'
+
+# key id, event id, random serial; followed by the truncated HMAC
+PAYLOAD = struct.Struct('>BI6s')
+MAC_SIZE = 8
+
+SignedCode = namedtuple('SignedCode', ['key_id', 'event_id', 'serial'])
+
+
+def is_signed_code(code):
+    return code.startswith(SIGNED_PREFIX)
+
+
+def sign_codes(event_id, count):
+    """Generate `count` signed codes for `event_id` with the current signing key"""
+    keys = _signing_keys()
+    key_id = current_app.config['TICKET_SIGNING_KEY_ID']
+    if key_id not in keys:
+        raise RuntimeError(f'TICKET_SIGNING_KEY_ID {key_id} has no entry in TICKET_SIGNING_KEYS')
+    key = keys[key_id]
+
+    serials = os.urandom(6 * count)
+    codes = []
+    for i in range(0, len(serials), 6):
+        payload = PAYLOAD.pack(key_id, event_id, serials[i:i + 6])
+        codes.append(_encode(payload + _mac(key, payload)))
+    return codes
+
+
+def verify_code(code):
+    """Return the SignedCode for a genuine signed code, or None if it is malformed or forged.
+
+    The MAC is compared in constant time; no database access is needed.
+    Codes signed with any key still listed in TICKET_SIGNING_KEYS verify, so
+    keys can be rotated without invalidating tickets already issued.
+    """
+    if not is_signed_code(code):
+        return None
+    body = code[len(SIGNED_PREFIX):]
+    try:
+        raw = base64.b32decode(body + '=' * (-len(body) % 8), casefold=True)
+    except ValueError:
+        return None
+    if len(raw) != PAYLOAD.size + MAC_SIZE:
+        return None
+
+    payload, mac = raw[:PAYLOAD.size], raw[PAYLOAD.size:]
+    key_id, event_id, serial = PAYLOAD.unpack(payload)
+    key = _signing_keys().get(key_id)
+    if key is None or not hmac.compare_digest(mac, _mac(key, payload)):
+        return None
+    return SignedCode(key_id, event_id, serial)
+
+
+def _mac(key, payload):
+    return hmac.new(key, payload, hashlib.sha256).digest()[:MAC_SIZE]
+
+
+def _encode(raw):
+    return SIGNED_PREFIX + base64.b32encode(raw).decode('ascii').rstrip('=')
+
+
+def _signing_keys():
+    keys = current_app.extensions.get('ticket_signing_keys')
+    if keys is None:
+        keys = current_app.extensions['ticket_signing_keys'] = parse_signing_keys(
+            current_app.config['TICKET_SIGNING_KEYS'], current_app.config['SECRET_KEY']
+        )
+    return keys
+
+
+def parse_signing_keys(value, secret_key=None):
+    """Parse 'id:secret,id:secret' into {id: key bytes}.
+
+    With `secret_key`, key 0 is derived from it unless listed explicitly, so
+    codes signed before any keys were configured keep verifying. They stop
+    verifying if SECRET_KEY changes; see check_signing_keys().
+    """
+    keys = {}
+    if secret_key is not None:
+        keys[0] = hmac.new(secret_key.encode('utf-8'), b'ticket-codes', hashlib.sha256).digest()
+    for entry in filter(None, value.split(',')):
+        key_id, _, secret = entry.strip().partition(':')
+        if not secret or not key_id.isdigit() or int(key_id) > 255:
+            raise ValueError('TICKET_SIGNING_KEYS entries must look like "<0-255>:<secret>"')
+        keys[int(key_id)] = secret.encode('utf-8')
+    return keys
+
+
+def check_signing_keys(app):
+    """Refuse to start with a real SECRET_KEY unless the signing key is listed explicitly.
+
+    A key derived from SECRET_KEY would make every ticket already issued
+    verify as forged, and be turned away at the door, the next time
+    SECRET_KEY is rotated.
+    """
+    if app.config['SECRET_KEY'] == DEV_SECRET_KEY:
+        return
+    key_id = app.config['TICKET_SIGNING_KEY_ID']
+    if key_id not in parse_signing_keys(app.config['TICKET_SIGNING_KEYS']):
+        raise RuntimeError(
+            f'TICKET_SIGNING_KEYS must list TICKET_SIGNING_KEY_ID ({key_id}) when SECRET_KEY is set; '
+            'ticket codes must not depend on SECRET_KEY'
+        )
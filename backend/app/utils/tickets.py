@@ -0,0 +1,58 @@
+from sqlalchemy import insert
+from app.models import db, OrderItem, Ticket
+from app.utils.qr import qr_code_url
+
+
+def issue_tickets(order, cart_items, holder_name=None, holder_email=None):
+    """Create an order's items and tickets with bulk inserts.
+
+    Order items are inserted in one executemany, using RETURNING to get their
+    ids back where the backend supports it; tickets for every line follow in
+    a second executemany, each with the URL its QR image will be served from.
+    Returns the number of tickets issued.
+    """
+    item_rows = [
+        {
+            'order_id': order.id,
+            'event_id': cart_item.ticket_type.event_id,
+            'ticket_type_id': cart_item.ticket_type_id,
+            'quantity': cart_item.quantity,
+            'unit_price': cart_item.unit_price,
+        }
+        for cart_item in cart_items
+    ]
+    if not item_rows:
+        return 0
+
+    item_ids = _insert_order_items(item_rows)
+
+    ticket_rows = [
+        {
+            'order_item_id': item_id,
+            'ticket_code': code,
+            'qr_code_url': qr_code_url(code),
+            'holder_name': holder_name,
+            'holder_email': holder_email,
+            'checked_in': False,
+        }
+        for item_id, row in zip(item_ids, item_rows)
+        for code in Ticket.generate_codes(row['quantity'], event_id=row['event_id'])
+    ]
+    db.session.execute(insert(Ticket), ticket_rows)
+    return len(ticket_rows)
+
+
+def _insert_order_items(rows):
+    dialect = db.session.get_bind().dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = db.session.execute(
+            insert(OrderItem).returning(OrderItem.id, sort_by_parameter_order=True),
+            rows
+        )
+        return result.scalars().all()
+
+    # No ordered RETURNING for executemany: let the unit of work batch the inserts
+    items = [OrderItem(**row) for row in rows]
+    db.session.add_all(items)
+    db.session.flush()
+    return [item.id for item in items]
@@ -51,6 +51,17 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # The event search index is created with raw DDL (app/models/event.py), so
+    # it is not in the metadata: keep autogenerate from dropping it. On SQLite
+    # that is the FTS5 table and its shadow tables (events_fts_data, _idx, ...).
+    if type_ == 'table' and reflected and (name == 'events_fts' or name.startswith('events_fts_')):
+        return False
+    if type_ == 'index' and reflected and name == 'ix_events_search':
+        return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +76,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +105,8 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
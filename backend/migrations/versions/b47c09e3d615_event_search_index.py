@@ -0,0 +1,58 @@
+"""Event search index
+
+Revision ID: b47c09e3d615
+Revises: 8d2e6b51a0c3
+Create Date: 2026-10-18 13:26:52.114870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b47c09e3d615'
+down_revision = '8d2e6b51a0c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+            "title, description, content='events', content_rowid='id', tokenize='porter unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN "
+            "INSERT INTO events_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN "
+            "INSERT INTO events_fts(events_fts, rowid, title, description) "
+            "VALUES ('delete', old.id, old.title, old.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF title, description ON events BEGIN "
+            "INSERT INTO events_fts(events_fts, rowid, title, description) "
+            "VALUES ('delete', old.id, old.title, old.description); "
+            "INSERT INTO events_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+        )
+        # Index rows that already exist
+        op.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_events_search ON events USING GIN "
+            "(to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, '')))"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS events_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS events_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS events_fts_ai")
+        op.execute("DROP TABLE IF EXISTS events_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_events_search")
@@ -0,0 +1,47 @@
+import time
+from app.utils.response_cache import ResponseCache
+
+
+def tagged_keys(cache):
+    return sum(len(keys) for keys in cache._tags.values())
+
+
+def test_tag_index_bounded_by_lru_eviction():
+    cache = ResponseCache(maxsize=16, ttl=60)
+    for i in range(1000):
+        cache.set(('events', i), i, tags=('event-list', f'event:{i}'))
+
+    assert cache.stats()['size'] == 16
+    assert len(cache._tags['event-list']) == 16
+    assert len(cache._tags) == 17
+    assert tagged_keys(cache) == 32
+
+
+def test_tag_index_pruned_on_expiry():
+    cache = ResponseCache(maxsize=16, ttl=0)
+    cache.set('a', 1, tags=('event-list',))
+    time.sleep(0.001)
+
+    assert cache.get('a') is None
+    assert cache._tags == {}
+
+
+def test_replacing_entry_drops_old_tags():
+    cache = ResponseCache(maxsize=16, ttl=60)
+    cache.set('a', 1, tags=('event:1',))
+    cache.set('a', 2, tags=('event:2',))
+
+    assert cache._tags == {'event:2': {'a'}}
+    cache.invalidate('event:1')
+    assert cache.get('a') == 2
+
+
+def test_invalidate_removes_key_from_every_tag():
+    cache = ResponseCache(maxsize=16, ttl=60)
+    cache.set('a', 1, tags=('event-list', 'event:1'))
+    cache.set('b', 2, tags=('event-list', 'event:2'))
+    cache.invalidate('event:1')
+
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    assert cache._tags == {'event-list': {'b'}, 'event:2': {'b'}}